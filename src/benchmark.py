@@ -0,0 +1,298 @@
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import queue as queue_module
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from .net_generators import FAMILIES, generate
+
+# ---------------------------
+# Benchmark cases
+# ---------------------------
+# analysis -> engines. Every (family, size, analysis, engine) case runs in
+# a fresh process, so its peak RSS (ru_maxrss) is its own and a case that
+# exceeds the timeout can be killed without affecting the others. Only the
+# analysis itself is timed; the prerequisites (e.g. the reachable-set BDD
+# for deadlock and optimization) are built before the clock starts but do
+# count towards peak RSS.
+
+CASES: Dict[str, List[str]] = {
+    "parse": ["pnml"],
+    "bfs": ["tuple", "bitset", "frontier", "reduced"],
+    "bdd": ["partitioned", "monolithic", "saturation", "native"],
+    "deadlock": ["ilp", "symbolic", "por"],
+    "optimize": ["bdd"],
+}
+
+FIELDS = [
+    "family", "size", "places", "transitions", "analysis", "engine",
+    "status", "time", "peak_rss_kb", "states", "bdd_nodes", "result",
+]
+
+
+def _run_case(family: str, size: int, analysis: str, engine: str) -> Dict[str, Any]:
+    # Imported here so each child only loads what its case needs
+    from .task3_BDD import bdd_node_count, bdd_reachable
+
+    pn = generate(family, size)
+    record: Dict[str, Any] = {"places": len(pn.place_ids), "transitions": len(pn.trans_ids)}
+
+    def reachable_set():
+        return bdd_reachable(pn, backend="native", return_vars=True)
+
+    if analysis == "parse":
+        from .task1_PetriNet import PetriNet
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "net.pnml")
+            pn.to_pnml(path)
+            start = time.perf_counter()
+            PetriNet.from_pnml(path)
+            elapsed = time.perf_counter() - start
+
+    elif analysis == "bfs":
+        from .task2_BFS import bfs_reachable
+        start = time.perf_counter()
+        if engine == "reduced":
+            # Bitset BFS of the agglomerated net (fewer states, same
+            # deadlocks); the reduction itself is timed too
+            from .task1_Reduction import reduce_net
+            states = bfs_reachable(reduce_net(pn, agglomerate=True).net, "bitset")
+        else:
+            states = bfs_reachable(pn, engine)
+        elapsed = time.perf_counter() - start
+        record["states"] = len(states)
+
+    elif analysis == "bdd":
+        backend, method = ("native", "partitioned") if engine == "native" else ("pyeda", engine)
+        start = time.perf_counter()
+        S, count = bdd_reachable(pn, method=method, backend=backend)
+        elapsed = time.perf_counter() - start
+        record["states"] = count
+        record["bdd_nodes"] = bdd_node_count(S)
+
+    elif analysis == "deadlock":
+        from .task4_Deadlock import deadlock_detecting
+        S, count, X = reachable_set()
+        start = time.perf_counter()
+        dead = deadlock_detecting(pn, S, method=engine, place_vars=X)
+        elapsed = time.perf_counter() - start
+        record["states"] = count
+        record["result"] = "deadlock" if dead is not None else "none"
+
+    elif analysis == "optimize":
+        from .task5_Optimization import max_reachable_marking
+        S, count, X = reachable_set()
+        # Fixed objective per net size, so runs are comparable
+        c = np.random.default_rng(len(pn.place_ids)).integers(-5, 6, len(pn.place_ids))
+        start = time.perf_counter()
+        _, value = max_reachable_marking(pn.place_names, S, c, X)
+        elapsed = time.perf_counter() - start
+        record["states"] = count
+        record["result"] = value
+
+    else:
+        raise ValueError(f"Unknown analysis: {analysis}")
+
+    record["time"] = elapsed
+    record["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return record
+
+
+def _child(queue, *args) -> None:
+    try:
+        queue.put(("ok", _run_case(*args)))
+    except Exception as e:
+        queue.put(("error", {"result": f"{type(e).__name__}: {e}"}))
+
+
+def run_case(family: str, size: int, analysis: str, engine: str, timeout: float = 300.0) -> Dict[str, Any]:
+    """
+    Runs one case in a fresh process and returns its record (see FIELDS).
+    status is "ok", "error" or "timeout".
+    """
+    record: Dict[str, Any] = {k: None for k in FIELDS}
+    record.update(family=family, size=size, analysis=analysis, engine=engine)
+
+    ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(queue, family, size, analysis, engine))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status, values = queue.get(timeout=0.1)
+            break
+        except queue_module.Empty:
+            pass
+        if not proc.is_alive():
+            # Died without reporting (e.g. killed for running out of memory)
+            try:
+                status, values = queue.get(timeout=0.5)
+            except queue_module.Empty:
+                status, values = "error", {"result": f"exit code {proc.exitcode}"}
+            break
+        if time.monotonic() > deadline:
+            status, values = "timeout", {}
+            proc.kill()
+            break
+    proc.join()
+
+    record.update(values)
+    record["status"] = status
+    return record
+
+
+def run_benchmark(
+    families: Sequence[str],
+    sizes: Sequence[int],
+    analyses: Optional[Sequence[str]] = None,
+    timeout: float = 300.0,
+    verbose: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Sweeps families x sizes x analyses x engines (see CASES).
+    """
+    records = []
+    for family in families:
+        for size in sizes:
+            for analysis in (analyses or list(CASES)):
+                for engine in CASES[analysis]:
+                    r = run_case(family, size, analysis, engine, timeout)
+                    records.append(r)
+                    if verbose:
+                        t = f"{r['time']:.4f}s" if r["time"] is not None else "-"
+                        print(f"{family:>12} {size:>4} {analysis:>8} {engine:>11} "
+                              f"{r['status']:>7} {t:>10} rss={r['peak_rss_kb']} "
+                              f"states={r['states']} nodes={r['bdd_nodes']}", flush=True)
+    return records
+
+
+# ---------------------------
+# Results I/O and comparison
+# ---------------------------
+
+def save_results(records: List[Dict[str, Any]], path: str) -> None:
+    """
+    Writes records as JSON (*.json) or CSV (anything else).
+    """
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(records, f, indent=1)
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for r in records:
+            writer.writerow({k: r.get(k) for k in FIELDS})
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+
+    def value(v: str):
+        if v == "":
+            return None
+        for cast in (int, float):
+            try:
+                return cast(v)
+            except ValueError:
+                pass
+        return v
+
+    with open(path, newline="") as f:
+        return [{k: value(v) for k, v in row.items()} for row in csv.DictReader(f)]
+
+
+def compare_results(
+    baseline: List[Dict[str, Any]],
+    current: List[Dict[str, Any]],
+    time_ratio: float = 1.5,
+    rss_ratio: float = 1.5,
+    min_time: float = 0.01,
+) -> List[Dict[str, Any]]:
+    """
+    Flags cases of `current` that got worse than in `baseline`.
+
+    A case regresses when its time grows by more than time_ratio (ignored
+    below min_time seconds, where timings are noise), its peak RSS grows
+    by more than rss_ratio, it no longer finishes, it is missing from the
+    current run, or its state count or result changes (a correctness
+    problem rather than a slowdown).
+    """
+    def key(r):
+        return (r["family"], int(r["size"]), r["analysis"], r["engine"])
+
+    old = {key(r): r for r in baseline}
+    flags = []
+
+    def flag(k, metric, before, after):
+        flags.append(dict(zip(("family", "size", "analysis", "engine"), k),
+                          metric=metric, baseline=before, current=after))
+
+    for r in current:
+        k = key(r)
+        b = old.get(k)
+        if b is None:
+            continue
+        if b["status"] == "ok" and r["status"] != "ok":
+            flag(k, "status", b["status"], r["status"])
+            continue
+        if b["status"] != "ok" or r["status"] != "ok":
+            continue
+        for metric in ("states", "result"):
+            if b.get(metric) is not None and str(b[metric]) != str(r.get(metric)):
+                flag(k, metric, b[metric], r.get(metric))
+        if r["time"] > max(b["time"], min_time) * time_ratio:
+            flag(k, "time", b["time"], r["time"])
+        if b["peak_rss_kb"] and r["peak_rss_kb"] > b["peak_rss_kb"] * rss_ratio:
+            flag(k, "peak_rss_kb", b["peak_rss_kb"], r["peak_rss_kb"])
+
+    # Cases of the baseline the current run lost altogether
+    new = {key(r) for r in current}
+    for k, b in old.items():
+        if k not in new:
+            flag(k, "missing", b["status"], None)
+    return flags
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Petri net analyses on synthetic nets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="sweep families, sizes and engines")
+    run.add_argument("--families", nargs="+", default=sorted(FAMILIES), choices=sorted(FAMILIES))
+    run.add_argument("--sizes", nargs="+", type=int, default=[2, 4, 6])
+    run.add_argument("--analyses", nargs="+", choices=list(CASES), default=None)
+    run.add_argument("--timeout", type=float, default=300.0, help="seconds per case")
+    run.add_argument("--out", nargs="+", default=["bench.json"], help="*.json and/or *.csv files")
+
+    cmp = sub.add_parser("compare", help="flag regressions of a run against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--time-ratio", type=float, default=1.5)
+    cmp.add_argument("--rss-ratio", type=float, default=1.5)
+    cmp.add_argument("--min-time", type=float, default=0.01)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        records = run_benchmark(args.families, args.sizes, args.analyses, args.timeout)
+        for path in args.out:
+            save_results(records, path)
+    else:
+        flags = compare_results(
+            load_results(args.baseline), load_results(args.current),
+            args.time_ratio, args.rss_ratio, args.min_time,
+        )
+        for f in flags:
+            print(f"REGRESSION {f['family']}({f['size']}) {f['analysis']}/{f['engine']}: "
+                  f"{f['metric']} {f['baseline']} -> {f['current']}")
+        print(f"{len(flags)} regression(s)")
+        sys.exit(1 if flags else 0)
@@ -0,0 +1,260 @@
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import queue as queue_module
+import resource
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+import numpy as np
+
+# ---------------------------
+# Batch analysis of many PNML models
+# ---------------------------
+# Every model is analysed in its own worker process, at most `jobs` at a
+# time. A fresh process per model lets each one have its own address-space
+# limit (RLIMIT_AS) and be killed at its deadline without disturbing the
+# others; its record is written as one JSON line as soon as it finishes,
+# so a slow or exploding model never holds back the rest of the batch.
+
+ANALYSES = ["bfs", "bdd", "deadlock", "optimize"]
+
+
+def find_models(patterns: Sequence[str]) -> List[str]:
+    """
+    Expands files, directories (searched recursively for *.pnml) and glob
+    patterns into a sorted, duplicate-free list of PNML paths.
+    """
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found += glob.glob(os.path.join(pattern, "**", "*.pnml"), recursive=True)
+        elif os.path.isfile(pattern):
+            found.append(pattern)
+        else:
+            found += [p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)]
+    return sorted(set(os.path.normpath(p) for p in found))
+
+
+def analyse_model(path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the selected analyses on one model. Each analysis reports its
+    time and engine counters (see instrument.Instrument).
+    """
+    from .instrument import Instrument
+    from .task1_NetCache import load_net
+
+    inst = Instrument(verbose=False)
+    analyses = options["analyses"]
+    results: Dict[str, Any] = {}
+
+    with inst.phase("load"):
+        pn = load_net(path, use_cache=options["net_cache"])
+
+    # Analyses run on the reduced net; markings are lifted back to pn
+    net, red = pn, None
+    if options["reduce"] != "none":
+        from .task1_Reduction import reduce_net
+        with inst.phase("reduce") as stats:
+            red = reduce_net(pn, agglomerate=options["reduce"] == "agglomerate", stats=stats)
+        net = red.net
+
+    if "bfs" in analyses:
+        from .task2_BFS import bfs_reachable
+        with inst.phase("bfs") as stats:
+            bfs_reachable(net, options["bfs_engine"], stats)
+
+    bdd = place_vars = None
+    # The "por" deadlock search is explicit-state and needs no BDD
+    needs_bdd = {"bdd", "optimize"} & set(analyses) or (
+        "deadlock" in analyses and options["deadlock_method"] != "por"
+    )
+    if needs_bdd:
+        from .task3_BDD import bdd_reachable
+        with inst.phase("bdd") as stats:
+            bdd, count, place_vars = bdd_reachable(
+                net, method=options["bdd_method"], backend=options["bdd_backend"],
+                order=options["bdd_order"], return_vars=True, stats=stats,
+            )
+            stats["states"] = count
+
+    if "deadlock" in analyses:
+        from .task4_Deadlock import deadlock_detecting
+        with inst.phase("deadlock") as stats:
+            dead = deadlock_detecting(
+                net, bdd, method=options["deadlock_method"], stats=stats, place_vars=place_vars,
+            )
+        if red is not None and dead is not None:
+            dead = list(red.lift(dead))
+        results["deadlock"] = dead
+
+    if "optimize" in analyses:
+        from .task5_Optimization import max_reachable_marking
+        num_places = len(pn.place_ids)
+        if options["objective"] is None:
+            c = np.ones(num_places)
+        else:
+            # Truncated or zero-padded to the number of places
+            given = np.asarray(options["objective"], dtype=float)[:num_places]
+            c = np.zeros(num_places)
+            c[:len(given)] = given
+        offset = 0
+        if red is not None:
+            c, offset = red.reduce_objective(c)
+        with inst.phase("optimize"):
+            marking, value = max_reachable_marking(net.place_names, bdd, c, place_vars)
+        if red is not None and marking is not None:
+            marking, value = list(red.lift(marking)), value + offset
+        results["optimize"] = {"marking": marking, "value": value}
+
+    phases = {p["name"]: {"time": p["time"], **p["stats"]} for p in inst.phases}
+    for name, result in results.items():
+        phases[name]["result"] = result
+    # Node histories and orders can be long; keep the summary numbers
+    if "bdd" in phases:
+        for key in ("nodes", "order", "image_times", "cache"):
+            phases["bdd"].pop(key, None)
+
+    return {
+        "places": len(pn.place_ids),
+        "transitions": len(pn.trans_ids),
+        "analyses": phases,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _worker(queue, path: str, options: Dict[str, Any]) -> None:
+    limit = options["memory_limit_mb"]
+    if limit:
+        resource.setrlimit(resource.RLIMIT_AS, (limit << 20, limit << 20))
+    try:
+        queue.put(("ok", analyse_model(path, options)))
+    except MemoryError:
+        queue.put(("memory", {"error": "memory limit exceeded"}))
+    except Exception as e:
+        queue.put(("error", {"error": f"{type(e).__name__}: {e}"}))
+
+
+def run_batch(
+    paths: Sequence[str],
+    options: Dict[str, Any],
+    jobs: int = 1,
+    timeout: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyses all paths, `jobs` models at a time, yielding one record per
+    model in completion order. A record's status is "ok", "error",
+    "memory" (limit hit) or "timeout".
+    """
+    ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    pending = list(reversed(paths))
+    running: Dict[str, Any] = {}     # path -> (process, queue, start time)
+
+    def finish(path: str, status: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        proc, _, started = running.pop(path)
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        return {"file": path, "status": status, "time": time.monotonic() - started, **values}
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            path = pending.pop()
+            q = ctx.Queue()
+            proc = ctx.Process(target=_worker, args=(q, path, options), daemon=True)
+            proc.start()
+            running[path] = (proc, q, time.monotonic())
+
+        for path in list(running):
+            proc, q, started = running[path]
+            try:
+                status, values = q.get_nowait()
+            except queue_module.Empty:
+                if timeout is not None and time.monotonic() - started > timeout:
+                    yield finish(path, "timeout", {"error": f"exceeded {timeout:g} s"})
+                elif not proc.is_alive():
+                    # Gone without a result, e.g. killed by the OS
+                    try:
+                        status, values = q.get(timeout=0.5)
+                    except queue_module.Empty:
+                        status, values = "error", {"error": f"worker exit code {proc.exitcode}"}
+                    yield finish(path, status, values)
+                continue
+            yield finish(path, status, values)
+
+        time.sleep(0.01)
+
+
+def _write_line(out: TextIO, record: Dict[str, Any]) -> None:
+    out.write(json.dumps(record, default=lambda v: v.tolist() if hasattr(v, "tolist") else str(v)) + "\n")
+    out.flush()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Analyse many PNML models concurrently; one JSON line per model."
+    )
+    parser.add_argument("models", nargs="+", help="PNML files, directories or glob patterns")
+    parser.add_argument("--analyses", nargs="+", choices=ANALYSES, default=ANALYSES)
+    parser.add_argument("--bfs-engine", choices=["tuple", "bitset", "frontier"], default="bitset")
+    parser.add_argument("--bdd-method", choices=["partitioned", "monolithic", "saturation"], default="partitioned")
+    parser.add_argument("--bdd-backend", choices=["pyeda", "native"], default="native")
+    parser.add_argument("--bdd-order", choices=["natural", "dfs", "force"], default="natural")
+    parser.add_argument("--deadlock-method", choices=["ilp", "symbolic", "por"], default="symbolic",
+                        help="por: explicit search with stubborn-set reduction (no BDD)")
+    parser.add_argument("--reduce", choices=["none", "exact", "agglomerate"], default="none",
+                        help="structural reduction first (agglomerate also fuses series "
+                             "places/transitions: fewer states, deadlocks kept)")
+    parser.add_argument("--objective", metavar="FILE",
+                        help="weights for optimize (first row of the file; default: all ones)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per model")
+    parser.add_argument("--memory-limit", type=int, default=None, metavar="MB",
+                        help="address-space limit per model")
+    parser.add_argument("--no-net-cache", action="store_true", help="always parse the PNML")
+    parser.add_argument("-o", "--output", help="JSON lines file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.bdd_backend == "native" and args.bdd_method == "saturation":
+        parser.error("--bdd-method saturation needs --bdd-backend pyeda")
+    if args.reduce == "agglomerate" and "optimize" in args.analyses:
+        parser.error("--reduce agglomerate does not preserve c·M; use --reduce exact with optimize")
+
+    paths = find_models(args.models)
+    if not paths:
+        parser.error("no PNML models found")
+
+    objective = None
+    if args.objective:
+        from .task5_Optimization import load_objectives
+        objective = load_objectives(args.objective)[0].tolist()
+
+    options = {
+        "analyses": args.analyses,
+        "bfs_engine": args.bfs_engine,
+        "bdd_method": args.bdd_method,
+        "bdd_backend": args.bdd_backend,
+        "bdd_order": args.bdd_order,
+        "deadlock_method": args.deadlock_method,
+        "objective": objective,
+        "reduce": args.reduce,
+        "memory_limit_mb": args.memory_limit,
+        "net_cache": not args.no_net_cache,
+    }
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    failed = 0
+    try:
+        for record in run_batch(paths, options, max(1, args.jobs), args.timeout):
+            failed += record["status"] != "ok"
+            _write_line(out, record)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# ---------------------------
+# Run instrumentation
+# ---------------------------
+# Each phase of a run is timed with perf_counter and gets a stats dict that
+# is handed to the engine (the engines' own `stats` parameter), so the
+# counters are collected where the work happens at the cost of a few
+# integer increments. Heavier tools are opt-in per run: tracemalloc for
+# the peak Python allocation of a phase (slows allocation-heavy code
+# several-fold) and cProfile for a per-phase function profile.
+
+class Instrument:
+    """
+    Collects timings, engine counters and optional memory/profile data for
+    the phases of one run.
+
+    Args:
+        trace_memory: Record each phase's peak traced allocation
+                      (tracemalloc).
+        profile: Run each phase under cProfile and keep the top functions.
+        profile_dir: If given, also dump each phase's profile there as
+                     <phase>.prof (for snakeviz / pstats).
+        verbose: Print a one-line summary after each phase.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        profile: bool = False,
+        profile_dir: Optional[str] = None,
+        verbose: bool = True,
+    ):
+        self.trace_memory = trace_memory
+        self.profile = profile or profile_dir is not None
+        self.profile_dir = profile_dir
+        self.verbose = verbose
+        self.phases: List[Dict[str, Any]] = []
+        self.started = time.time()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Times the enclosed block. Yields the stats dict to pass to the
+        engine (its counters end up in the phase record).
+        """
+        record: Dict[str, Any] = {"name": name, "stats": {}}
+        profiler = cProfile.Profile() if self.profile else None
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        if profiler is not None:
+            profiler.enable()
+        start_t = time.perf_counter()
+        try:
+            yield record["stats"]
+        finally:
+            record["time"] = time.perf_counter() - start_t
+            if profiler is not None:
+                profiler.disable()
+                record["profile"] = _top_functions(profiler)
+                if self.profile_dir is not None:
+                    os.makedirs(self.profile_dir, exist_ok=True)
+                    profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            if self.trace_memory:
+                record["traced_peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.stop()
+            # Process-wide high-water mark so far (free to read)
+            record["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.phases.append(record)
+            if self.verbose:
+                print(self.summary(record))
+
+    @staticmethod
+    def summary(record: Dict[str, Any]) -> str:
+        line = f"   Time: {record['time']:.6f} sec"
+        stats = record["stats"]
+        if "states_per_sec" in stats:
+            line += f", {stats['states_per_sec']:.0f} states/sec, {stats['fired']} firings"
+        if "image_times" in stats:
+            line += f", {stats['iterations']} iterations, peak {stats['peak_nodes']} nodes"
+        if "rounds" in stats:
+            line += f", {stats['rounds']} ILP rounds ({stats['solve_time']:.6f} sec solving)"
+        if "traced_peak_kb" in record:
+            line += f"\n   Peak memory: {record['traced_peak_kb']:.2f} KB"
+        return line
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "trace_memory": self.trace_memory,
+            "profile": self.profile,
+            "total_time": sum(p["time"] for p in self.phases),
+            "phases": self.phases,
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1, default=_jsonable)
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    The `limit` functions with the highest cumulative time.
+    """
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({func})",
+            "calls": nc,
+            "tottime": tt,
+            "cumtime": ct,
+        })
+    rows.sort(key=lambda r: -r["cumtime"])
+    return rows[:limit]
+
+
+def _jsonable(value: Any) -> Any:
+    # NumPy scalars/arrays and other odd values in engine stats
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
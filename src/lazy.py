@@ -0,0 +1,30 @@
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Optional
+
+# ---------------------------
+# Deferred imports
+# ---------------------------
+# PuLP, HiGHS and graphviz take far longer to import than a small net takes
+# to analyse. Modules bound through lazy_import are only executed on the
+# first attribute access, so a run that never builds an ILP or draws a BDD
+# never pays for them.
+
+def lazy_import(name: str) -> Optional[ModuleType]:
+    """
+    Returns module `name`, loaded on first attribute access, or None if it
+    is not installed (so optional dependencies can still be tested with
+    `is None`).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
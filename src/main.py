@@ -1,64 +1,72 @@
-from .task1_PetriNet import PetriNet
-from .task2_BFS import bfs_reachable
-from .task3_BDD import bdd_reachable, visualize_bdd
-from .task4_Deadlock import deadlock_detecting
-from .task5_Optimization import max_reachable_marking
-from pyeda.inter import *
+from .task1_NetCache import load_net
+from .task1_Reduction import reduce_net
+from .task3_BDD import iter_markings, visualize_bdd
+from .task4_Deadlock import deadlock_on_the_fly
+from .task5_Optimization import load_objectives, optimize_batch
+from .result_cache import (
+    ResultCache, cached_bdd_reachable, cached_bfs_packed, cached_deadlock,
+    cached_max_marking,
+)
+from .instrument import Instrument
+from itertools import islice
+import argparse
 import numpy as np
-import time
-import tracemalloc   # <-- added
 
-# Function to measure time + memory
-def measure(func, *args):
-    tracemalloc.start()
-    start_t = time.perf_counter()
+# Reachable markings printed after the BDD step
+SHOW_MARKINGS = 20
 
-    result = func(*args)
-
-    end_t = time.perf_counter()
-    current, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
-
-    print(f"   Time: {end_t - start_t:.6f} sec")
-    print(f"   Memory used: {current / 1024:.2f} KB")
-
-    return result, end_t - start_t
-
-def main():
+def main(objectives_file=None, trace_memory=False, profile_dir=None, json_path=None):
     # ------------------------------------------------------
     # 1. Load Petri Net
     # ------------------------------------------------------
     filename = "tests/test1.pnml" # Change model file here!!!
     print("Loading PNML:", filename)
 
-    start = time.perf_counter()
-    pn = PetriNet.from_pnml(filename)
-    load_time = time.perf_counter() - start
+    # Per-phase timings and engine counters (memory tracing / cProfile opt-in)
+    inst = Instrument(trace_memory=trace_memory, profile_dir=profile_dir)
+
+    # Reuses the compiled net from .pn_cache when the PNML is unchanged
+    with inst.phase("load"):
+        pn = load_net(filename)
 
     print("\n--- Petri Net Loaded ---")
     print(pn)
 
+    # Results of earlier runs on the same net are reused from .pn_results
+    cache = ResultCache()
+
     # ------------------------------------------------------
-    # 2. BFS reachable
+    # 2. Structural reduction
+    # ------------------------------------------------------
+    # Dead transitions, constant and implied places are removed; the
+    # reachable set of `net` maps one-to-one onto that of pn (red.lift)
+    print("\n--- Structural Reduction ---")
+    with inst.phase("reduce") as stats:
+        red = reduce_net(pn, stats=stats)
+    print(red.summary())
+    net = red.net
+
+    # ------------------------------------------------------
+    # 3. BFS reachable
     # ------------------------------------------------------
     print("\n--- BFS Reachable Markings ---")
-    (bfs_set), bfs_time = measure(bfs_reachable, pn)
+    with inst.phase("bfs") as stats:
+        bfs_set = cached_bfs_packed(net, cache, stats)
 
-    # for m in bfs_set:
-    #     print(np.array(m))
     print("Total BFS reachable =", len(bfs_set))
 
     # ------------------------------------------------------
-    # 3. BDD reachable
+    # 4. BDD reachable
     # ------------------------------------------------------
     print("\n--- BDD Reachable Markings ---")
-    (bdd_result), bdd_time = measure(bdd_reachable, pn)
-    bdd, count = bdd_result
-
-    print("--- Satisfying assignments ---")
-    for sat in bdd.satisfy_all():
-        line = ", ".join(f"{var.names[0]}={val}" for var, val in sat.items())
-        print(line)
+    # Native BDD core on the hot path (backend="pyeda" for cross-checking)
+    with inst.phase("bdd") as stats:
+        bdd, count, place_vars = cached_bdd_reachable(net, cache, backend="native", stats=stats)
+
+    # Markings are streamed from the BDD, so only the printed ones are built
+    print(f"--- Reachable markings (first {SHOW_MARKINGS}) ---")
+    for marking in islice(red.lift_markings(iter_markings(bdd, place_vars)), SHOW_MARKINGS):
+        print(list(marking))
     print("BDD reachable markings =", count)
 
     # --- Drawing BDD ---
@@ -70,29 +78,77 @@ def main():
         print(f"Warning: Could not draw BDD. Make sure Graphviz is installed. Error: {e}")
     
     # ------------------------------------------------------
-    # 4. Deadlock detection
+    # 5. Deadlock detection
     # ------------------------------------------------------
     print("\n--- Deadlock Detecting ---")
-    (dead), deadlock_time = measure(deadlock_detecting, pn, bdd)
+    with inst.phase("deadlock") as stats:
+        dead = cached_deadlock(net, bdd, cache, place_vars=place_vars, stats=stats)
 
     if dead is not None:
-        print("Deadlock marking:", dead)
+        print("Deadlock marking:", list(red.lift(dead)))
     else:
         print("No deadlock reachable.")
 
+    print("\n--- On-the-fly Deadlock Detecting (BFS) ---")
+    # Series places/transitions are fused as well: this keeps every
+    # deadlock but skips the intermediate markings, so fewer states are seen
+    with inst.phase("deadlock_on_the_fly") as stats:
+        fused = reduce_net(pn, agglomerate=True)
+        dead, witness, otf_stats = deadlock_on_the_fly(fused.net, "bfs")
+        stats.update(otf_stats)
+    if dead is not None:
+        print("Deadlock marking:", list(fused.lift(dead)))
+        print("Firing sequence:", fused.lift_sequence(witness))
+    else:
+        print("No deadlock reachable.")
+    print(f"   Time to first deadlock: {otf_stats['time']:.6f} sec ({otf_stats['states']} states)")
+
     # ------------------------------------------------------
-    # 5. Optimization: maximize c·M
+    # 6. Optimization: maximize c·M
     # ------------------------------------------------------
     c = np.array([-1, -2, 4, -3, -3, 0, -5, -2, 4, 4])
     print("\n--- Optimize c·M ---")
 
-    (opt_result), opt_time = measure(max_reachable_marking, pn.place_names, bdd, c)
-    max_mark, max_val = opt_result
+    # c·M over pn = c'·M' + offset over the reduced net
+    c_net, offset = red.reduce_objective(c)
+    with inst.phase("optimize"):
+        max_mark, max_val = cached_max_marking(net, bdd, c_net, cache, place_vars)
+    if max_mark is not None:
+        max_mark, max_val = list(red.lift(max_mark)), max_val + offset
 
     print("c:", c)
     print("Max marking:", max_mark)
     print("Max value:", max_val)
 
-if __name__ == "__main__":
-    main()
+    # ------------------------------------------------------
+    # 7. Batch optimization: one objective per row of a file
+    # ------------------------------------------------------
+    if objectives_file is not None:
+        print("\n--- Batch optimize c·M ---")
+        C = load_objectives(objectives_file)
+        reduced = [red.reduce_objective(row) for row in C]
+        with inst.phase("optimize_batch"):
+            markings, values = optimize_batch(
+                net.place_names, bdd, np.array([r for r, _ in reduced]), place_vars,
+            )
+        for row, (_, offset), marking, value in zip(C, reduced, markings, values):
+            print(f"c={row.tolist()} -> max {value + offset:g} at {list(red.lift(marking))}")
 
+    # ------------------------------------------------------
+    # 8. Machine-readable run report
+    # ------------------------------------------------------
+    if json_path is not None:
+        inst.write_json(json_path)
+        print(f"\nRun report written to {json_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse a Petri net.")
+    # Optional argument: file of objectives, one weight vector per line
+    parser.add_argument("objectives", nargs="?", help="objectives file for batch optimization")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record peak allocation per phase (tracemalloc, slow)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="run phases under cProfile and dump <phase>.prof files to DIR")
+    parser.add_argument("--json", metavar="PATH", help="write timings and counters as JSON")
+    args = parser.parse_args()
+    main(args.objectives, args.trace_memory, args.profile, args.json)
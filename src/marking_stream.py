@@ -0,0 +1,85 @@
+import gzip
+import zipfile
+import numpy as np
+from typing import Iterable, Iterator, Sequence
+from numpy.lib import format as npy_format
+
+# ---------------------------
+# Streaming marking output
+# ---------------------------
+# Helpers for the marking generators (bfs_stream, iter_markings): group
+# markings into fixed-size NumPy chunks and write them to compressed files
+# one chunk at a time, so no stage holds more than one chunk.
+
+def chunk_markings(
+    markings: Iterable[Sequence[int]],
+    num_places: int,
+    chunk_size: int = 65536,
+) -> Iterator[np.ndarray]:
+    """
+    Groups markings into (<= chunk_size x places) uint8 arrays.
+    """
+    buf = np.empty((chunk_size, num_places), dtype=np.uint8)
+    n = 0
+    for m in markings:
+        buf[n] = m
+        n += 1
+        if n == chunk_size:
+            yield buf.copy()
+            n = 0
+    if n:
+        yield buf[:n].copy()
+
+
+def write_markings(
+    path: str,
+    markings: Iterable[Sequence[int]],
+    num_places: int,
+    chunk_size: int = 65536,
+) -> int:
+    """
+    Streams markings to a compressed file. Returns the number written.
+
+    - *.npz: one deflated .npy member per chunk (chunk_000000, ...), so
+      np.load(path) can open the chunks one by one.
+    - anything else: gzip text, one marking per line as a 0/1 string.
+    """
+    count = 0
+    chunks = chunk_markings(markings, num_places, chunk_size)
+    if path.endswith(".npz"):
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for i, chunk in enumerate(chunks):
+                with zf.open(f"chunk_{i:06d}.npy", "w", force_zip64=True) as f:
+                    npy_format.write_array(f, chunk, allow_pickle=False)
+                count += len(chunk)
+        return count
+
+    with gzip.open(path, "wt") as f:
+        for chunk in chunks:
+            digits = (chunk + ord("0")).view("S1").reshape(len(chunk), num_places)
+            f.write("\n".join(row.tobytes().decode() for row in digits) + "\n")
+            count += len(chunk)
+    return count
+
+
+def read_markings(path: str) -> Iterator[np.ndarray]:
+    """
+    Reads back a file of write_markings, chunk by chunk.
+    """
+    if path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as z:
+            for name in sorted(z.files):
+                yield z[name]
+        return
+
+    with gzip.open(path, "rt") as f:
+        rows = []
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append([int(ch) for ch in line])
+            if len(rows) == 65536:
+                yield np.array(rows, dtype=np.uint8)
+                rows = []
+        if rows:
+            yield np.array(rows, dtype=np.uint8)
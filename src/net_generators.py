@@ -0,0 +1,158 @@
+import argparse
+from typing import Callable, Dict, List, Sequence
+import numpy as np
+from .task1_PetriNet import PetriNet, SparseIncidence
+
+# ---------------------------
+# Synthetic net families
+# ---------------------------
+# Parameterized 1-safe nets whose state spaces grow with n, for scaling
+# tests of all analyses. Every family returns a PetriNet; write one out
+# with pn.to_pnml(path) or `python -m src.net_generators FAMILY N PATH`.
+
+class _NetBuilder:
+    """
+    Collects named places/transitions and builds a PetriNet (unit arcs).
+    """
+
+    def __init__(self):
+        self.places: List[str] = []
+        self.tokens: List[int] = []
+        self.index: Dict[str, int] = {}
+        self.transitions: List[str] = []
+        self.pre: List[Dict[int, int]] = []
+        self.post: List[Dict[int, int]] = []
+
+    def place(self, name: str, tokens: int = 0) -> None:
+        self.index[name] = len(self.places)
+        self.places.append(name)
+        self.tokens.append(tokens)
+
+    def transition(self, name: str, inputs: Sequence[str], outputs: Sequence[str]) -> None:
+        self.transitions.append(name)
+        self.pre.append({self.index[p]: 1 for p in inputs})
+        self.post.append({self.index[p]: 1 for p in outputs})
+
+    def build(self) -> PetriNet:
+        num_places = len(self.places)
+        return PetriNet(
+            [f"p_{name}" for name in self.places],
+            [f"t_{name}" for name in self.transitions],
+            list(self.places),
+            list(self.transitions),
+            M0=np.array(self.tokens, dtype=int),
+            pre=SparseIncidence.from_rows(self.pre, num_places),
+            post=SparseIncidence.from_rows(self.post, num_places),
+        )
+
+
+def dining_philosophers(n: int) -> PetriNet:
+    """
+    n philosophers around n forks. Each takes the left fork, then the
+    right one, eats and puts both back. Deadlocks when every philosopher
+    holds a left fork. 4n places, 3n transitions.
+    """
+    b = _NetBuilder()
+    for i in range(n):
+        b.place(f"Think{i}", 1)
+        b.place(f"Fork{i}", 1)
+        b.place(f"HasLeft{i}")
+        b.place(f"Eat{i}")
+    for i in range(n):
+        right = f"Fork{(i + 1) % n}"
+        b.transition(f"TakeLeft{i}", [f"Think{i}", f"Fork{i}"], [f"HasLeft{i}"])
+        b.transition(f"TakeRight{i}", [f"HasLeft{i}", right], [f"Eat{i}"])
+        b.transition(f"Release{i}", [f"Eat{i}"], [f"Think{i}", f"Fork{i}", right])
+    return b.build()
+
+
+def token_ring(n: int) -> PetriNet:
+    """
+    n stations passing one token around a ring. Stations get ready on
+    their own (idle -> ready); a ready station holding the token works and
+    then passes the token on, an idle one just passes it. Deadlock-free;
+    about n * 2^n states. 4n places, 4n transitions.
+    """
+    b = _NetBuilder()
+    for i in range(n):
+        b.place(f"Token{i}", 1 if i == 0 else 0)
+        b.place(f"Idle{i}", 1)
+        b.place(f"Ready{i}")
+        b.place(f"Busy{i}")
+    for i in range(n):
+        nxt = f"Token{(i + 1) % n}"
+        b.transition(f"Prepare{i}", [f"Idle{i}"], [f"Ready{i}"])
+        b.transition(f"Start{i}", [f"Token{i}", f"Ready{i}"], [f"Busy{i}"])
+        b.transition(f"Finish{i}", [f"Busy{i}"], [f"Idle{i}", nxt])
+        b.transition(f"Pass{i}", [f"Token{i}", f"Idle{i}"], [f"Idle{i}", nxt])
+    return b.build()
+
+
+def fork_join(n: int, stages: int = 3) -> PetriNet:
+    """
+    A fork into n parallel branches of `stages` sequential steps each,
+    joined and restarted. The branches interleave freely, so the state
+    space grows like (stages + 1)^n. n * (stages + 1) + 2 places.
+    """
+    b = _NetBuilder()
+    b.place("Start", 1)
+    b.place("Done")
+    for i in range(n):
+        for s in range(stages + 1):
+            b.place(f"B{i}S{s}")
+    b.transition("Fork", ["Start"], [f"B{i}S0" for i in range(n)])
+    for i in range(n):
+        for s in range(stages):
+            b.transition(f"B{i}Step{s}", [f"B{i}S{s}"], [f"B{i}S{s + 1}"])
+    b.transition("Join", [f"B{i}S{stages}" for i in range(n)], ["Done"])
+    b.transition("Restart", ["Done"], ["Start"])
+    return b.build()
+
+
+def shared_resource(n: int) -> PetriNet:
+    """
+    n clients competing for one mutex: idle -> waiting -> critical -> idle.
+    Mutual exclusion holds and there is no deadlock. 3n + 1 places,
+    3n transitions.
+    """
+    b = _NetBuilder()
+    b.place("Mutex", 1)
+    for i in range(n):
+        b.place(f"Idle{i}", 1)
+        b.place(f"Wait{i}")
+        b.place(f"Crit{i}")
+    for i in range(n):
+        b.transition(f"Request{i}", [f"Idle{i}"], [f"Wait{i}"])
+        b.transition(f"Acquire{i}", [f"Wait{i}", "Mutex"], [f"Crit{i}"])
+        b.transition(f"Release{i}", [f"Crit{i}"], [f"Idle{i}", "Mutex"])
+    return b.build()
+
+
+FAMILIES: Dict[str, Callable[[int], PetriNet]] = {
+    "philosophers": dining_philosophers,
+    "ring": token_ring,
+    "forkjoin": fork_join,
+    "resource": shared_resource,
+}
+
+
+def generate(family: str, n: int) -> PetriNet:
+    """
+    Instance of size n of a family in FAMILIES.
+    """
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown net family: {family}")
+    return FAMILIES[family](n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic Petri net as PNML.")
+    parser.add_argument("family", choices=sorted(FAMILIES))
+    parser.add_argument("n", type=int, help="instance size")
+    parser.add_argument("path", help="output .pnml file")
+    args = parser.parse_args()
+
+    pn = generate(args.family, args.n)
+    pn.to_pnml(args.path)
+    print(f"{args.family}({args.n}): {len(pn.place_ids)} places, "
+          f"{len(pn.trans_ids)} transitions -> {args.path}")
@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from .task1_PetriNet import PetriNet
+from .task1_NetCache import net_digest
+from .task2_BFS import bfs_reachable_packed
+from .task3_BDD import bdd_place_vars, bdd_reachable, flatten_bdd, place_variables
+from .task3_NativeBDD import BDDManager, NativeBDD
+from .task3_Ordering import variable_order
+from .task4_Deadlock import deadlock_detecting
+from .task5_Optimization import max_reachable_marking
+from .lazy import lazy_import
+
+# Only restoring a PyEDA BDD needs it
+pyeda_bdd = lazy_import("pyeda.boolalg.bdd")
+
+# ---------------------------
+# Persistent result cache
+# ---------------------------
+# Entries are .npz files named by the SHA-256 of (net digest, analysis
+# kind, options), so an entry can only ever answer the exact question it
+# was computed for. Every entry also stores its key and a checksum of its
+# arrays; an entry that fails either check on load is deleted and treated
+# as a miss. The directory is kept under max_bytes by evicting the least
+# recently used entries (a hit refreshes the file's mtime).
+
+# Bumped whenever the layout of an entry changes
+RESULT_FORMAT = 1
+
+DEFAULT_RESULT_DIR = os.environ.get("PN_RESULT_DIR", ".pn_results")
+
+
+def _checksum(arrays: Dict[str, np.ndarray]) -> str:
+    h = hashlib.sha256()
+    for name in sorted(arrays):
+        arr = np.ascontiguousarray(arrays[name])
+        h.update(f"{name}:{arr.dtype.str}:{arr.shape}".encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk, content-addressed store of analysis results.
+
+    Args:
+        directory: Cache directory (default: $PN_RESULT_DIR or .pn_results).
+        max_bytes: Total size above which the oldest entries are evicted.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 << 20):
+        self.directory = DEFAULT_RESULT_DIR if directory is None else directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, pn: PetriNet, kind: str, **options: Any) -> str:
+        """
+        Cache key of analysis `kind` on pn with the given options.
+        """
+        def plain(v):
+            return v.tolist() if isinstance(v, np.ndarray) else v
+
+        payload = {
+            "format": RESULT_FORMAT,
+            "net": net_digest(pn),
+            "kind": kind,
+            "options": {k: plain(v) for k, v in options.items()},
+        }
+        text = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        The arrays stored under key, or None (missing or invalid entry).
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                arrays = {name: z[name] for name in z.files}
+            stored_key = str(arrays.pop("_key"))
+            stored_sum = str(arrays.pop("_checksum"))
+            if stored_key != key or stored_sum != _checksum(arrays):
+                raise ValueError("cache entry does not match its key or checksum")
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+            # Corrupt, truncated or foreign entry: drop it
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)      # LRU: mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Stores arrays under key (atomically), then evicts down to max_bytes.
+        """
+        arrays = {name: np.asarray(a) for name, a in arrays.items()}
+        entry = dict(arrays, _key=np.array(key), _checksum=np.array(_checksum(arrays)))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".npz.tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, **entry)
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, self._path(key))
+            finally:
+                self._remove(tmp)
+        except OSError:
+            return          # an unwritable cache only costs recomputation
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Deletes least recently used entries until the total fits max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".npz"):
+                    self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# ---------------------------
+# Cached analyses
+# ---------------------------
+# Each helper has the signature of the analysis it wraps plus the cache,
+# and returns exactly what the analysis returns, so a hit feeds straight
+# into the next step of the pipeline.
+
+def cached_bfs_packed(
+    pn: PetriNet,
+    cache: ResultCache,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Set[int]:
+    """
+    bfs_reachable_packed through the cache. The set is stored as an
+    (N x bytes) uint8 array of big-endian packed markings. `stats` is only
+    filled on a miss.
+    """
+    key = cache.key(pn, "bfs_packed")
+    nbytes = max(1, (len(pn.place_ids) + 7) // 8)
+    hit = cache.get(key)
+    if hit is not None:
+        return {int.from_bytes(row, "big") for row in map(bytes, hit["codes"])}
+
+    codes = bfs_reachable_packed(pn, stats)
+    table = np.frombuffer(
+        b"".join(code.to_bytes(nbytes, "big") for code in sorted(codes)), dtype=np.uint8
+    ).reshape(len(codes), nbytes)
+    cache.put(key, {"codes": table})
+    return codes
+
+
+def cached_bdd_reachable(
+    pn: PetriNet,
+    cache: ResultCache,
+    method: str = "partitioned",
+    order: Any = "natural",
+    interleave: bool = True,
+    backend: str = "pyeda",
+    **options: Any,
+) -> Tuple[Any, int, List[Any]]:
+    """
+    bdd_reachable(..., return_vars=True) through the cache: (S, count, X).
+
+    The BDD is stored as its node table over place indices (FlatBDD: place,
+    lo, hi, root) with the variable names and order, and rebuilt bottom-up
+    on a hit. A rebuilt native BDD lives in a manager that only has the
+    current-state variables. `stats` is only filled on a miss.
+    """
+    key_options = dict(options)
+    key_options.pop("stats", None)
+    key = cache.key(
+        pn, "bdd", method=method, order=order, interleave=interleave,
+        backend=backend, **key_options,
+    )
+    hit = cache.get(key)
+    if hit is not None:
+        return _restore_bdd(pn, hit, order, interleave, backend)
+
+    S, count, X = bdd_reachable(
+        pn, method=method, order=order, interleave=interleave,
+        backend=backend, return_vars=True, **options,
+    )
+    flat = flatten_bdd(S, X)
+    cache.put(key, {
+        "place": flat.place, "lo": flat.lo, "hi": flat.hi,
+        "root": np.array(flat.root), "order": np.array(flat.order, dtype=np.int64),
+        "names": np.array([v.names[0] for v in X], dtype=str),
+        "count": np.array(str(count)),
+    })
+    return S, count, X
+
+
+def _restore_bdd(pn: PetriNet, table: Dict[str, np.ndarray], order, interleave: bool, backend: str):
+    place, lo, hi = (table[k].tolist() for k in ("place", "lo", "hi"))
+    names = table["names"].tolist()
+    var_order = table["order"].tolist()
+    count = int(str(table["count"]))
+
+    if backend == "native":
+        mgr = BDDManager([names[p] for p in var_order])
+        level_of = {p: k for k, p in enumerate(var_order)}
+        node = [0, 1]
+        for u in range(2, len(place)):
+            node.append(mgr.mk(level_of[place[u]], node[lo[u]], node[hi[u]]))
+        S = NativeBDD(mgr, node[int(table["root"])])
+        return S, count, bdd_place_vars(pn, S)
+
+    # PyEDA orders variables by creation: create them as bdd_reachable
+    # would, then in the stored order (covers names changed by sifting)
+    place_variables(pn, variable_order(pn, order), interleave)
+    X: List[Any] = [None] * len(names)
+    for p in var_order:
+        X[p] = pyeda_bdd.bddvar(names[p])
+
+    node = [pyeda_bdd.BDDZERO, pyeda_bdd.BDDONE]
+    for u in range(2, len(place)):
+        x = X[place[u]]
+        node.append((x & node[hi[u]]) | (~x & node[lo[u]]))
+    return node[int(table["root"])], count, X
+
+
+def cached_deadlock(
+    pn: PetriNet,
+    bdd: Any,
+    cache: ResultCache,
+    **options: Any,
+) -> Optional[List[int]]:
+    """
+    deadlock_detecting through the cache. The answer only depends on the
+    net (the BDD is its reachable set), so the key is net + options.
+    """
+    key_options = {k: v for k, v in options.items() if k not in ("stats", "place_vars")}
+    key = cache.key(pn, "deadlock", **key_options)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit["marking"].tolist() if bool(hit["found"]) else None
+
+    dead = deadlock_detecting(pn, bdd, **options)
+    cache.put(key, {
+        "found": np.array(dead is not None),
+        "marking": np.array(dead if dead is not None else [], dtype=np.int64),
+    })
+    return dead
+
+
+def cached_max_marking(
+    pn: PetriNet,
+    bdd: Any,
+    c: np.ndarray,
+    cache: ResultCache,
+    place_vars: Optional[Sequence[Any]] = None,
+) -> Tuple[Optional[List[int]], Optional[Any]]:
+    """
+    max_reachable_marking(pn.place_names, bdd, c, place_vars) through the
+    cache, keyed by net + objective.
+    """
+    key = cache.key(pn, "max_marking", c=np.asarray(c))
+    hit = cache.get(key)
+    if hit is not None:
+        if not bool(hit["found"]):
+            return None, None
+        return hit["marking"].tolist(), hit["value"].item()
+
+    marking, value = max_reachable_marking(pn.place_names, bdd, c, place_vars)
+    cache.put(key, {
+        "found": np.array(marking is not None),
+        "marking": np.array(marking if marking is not None else [], dtype=np.int64),
+        "value": np.array(value if value is not None else 0),
+    })
+    return marking, value
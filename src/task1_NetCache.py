@@ -0,0 +1,156 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+import numpy as np
+from typing import Optional
+from .task1_PetriNet import PetriNet, SparseIncidence
+
+# ---------------------------
+# Binary net cache
+# ---------------------------
+# Parsing XML dominates short analyses, so a parsed net is saved as an
+# uncompressed .npz (ids, names, sparse pre/post arrays, M0) named after
+# the SHA-256 of the PNML bytes. Any edit of the PNML changes the digest,
+# so a cached file never has to be invalidated; stale entries are simply
+# never looked up again.
+
+# Bumped whenever the layout of the .npz changes
+CACHE_FORMAT = 1
+
+# Where load_net keeps the compiled nets unless told otherwise
+DEFAULT_CACHE_DIR = os.environ.get("PN_CACHE_DIR", ".pn_cache")
+
+
+def pnml_digest(filename: str) -> str:
+    """
+    SHA-256 of the PNML file contents (hex).
+    """
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def net_digest(pn: PetriNet) -> str:
+    """
+    SHA-256 of the net itself (ids, names, arcs, M0), independent of the
+    file it came from, for caching results of nets built in memory.
+    """
+    h = hashlib.sha256()
+    for values in (pn.place_ids, pn.trans_ids, pn.place_names, pn.trans_names):
+        h.update(repr(list(values)).encode())
+    for inc in (pn.pre, pn.post):
+        for arr in (inc.indptr, inc.indices, inc.data):
+            h.update(np.ascontiguousarray(arr, dtype=np.int64).tobytes())
+            h.update(b"|")
+    h.update(np.asarray(pn.M0, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+def save_net(pn: PetriNet, path: str) -> None:
+    """
+    Writes pn to path in the binary cache format (atomically).
+    """
+    def names(values):
+        # None is not storable without pickle: "" plus a presence mask
+        return np.array([v or "" for v in values], dtype=str), np.array([v is not None for v in values])
+
+    place_names, place_named = names(pn.place_names)
+    trans_names, trans_named = names(pn.trans_names)
+
+    arrays = dict(
+        format=np.array(CACHE_FORMAT),
+        place_ids=np.array(pn.place_ids, dtype=str),
+        trans_ids=np.array(pn.trans_ids, dtype=str),
+        place_names=place_names,
+        place_named=place_named,
+        trans_names=trans_names,
+        trans_named=trans_named,
+        M0=np.asarray(pn.M0, dtype=np.int64),
+    )
+    for key, inc in (("pre", pn.pre), ("post", pn.post)):
+        arrays[f"{key}_indptr"] = inc.indptr
+        arrays[f"{key}_indices"] = inc.indices
+        arrays[f"{key}_data"] = inc.data
+
+    # Write to a temp file in the same directory, then rename, so a
+    # concurrent reader never sees a half-written cache entry
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_net_npz(path: str) -> PetriNet:
+    """
+    Reads a net written by save_net. Raises ValueError if the file is not a
+    valid cache entry of the current format.
+    """
+    with np.load(path, allow_pickle=False) as z:
+        if "format" not in z.files or int(z["format"]) != CACHE_FORMAT:
+            raise ValueError(f"{path}: not a net cache file of format {CACHE_FORMAT}")
+
+        place_ids = z["place_ids"].tolist()
+        trans_ids = z["trans_ids"].tolist()
+        num_places, num_trans = len(place_ids), len(trans_ids)
+
+        def names(key):
+            return [v if named else None for v, named in zip(z[f"{key}_names"].tolist(), z[f"{key}_named"].tolist())]
+
+        def incidence(key):
+            inc = SparseIncidence(z[f"{key}_indptr"], z[f"{key}_indices"], z[f"{key}_data"], (num_trans, num_places))
+            if len(inc.indptr) != num_trans + 1 or inc.indptr[-1] != inc.nnz or len(inc.data) != inc.nnz:
+                raise ValueError(f"{path}: inconsistent {key} arrays")
+            return inc
+
+        M0 = z["M0"]
+        if len(M0) != num_places:
+            raise ValueError(f"{path}: M0 has {len(M0)} entries for {num_places} places")
+
+        return PetriNet(
+            place_ids, trans_ids, names("place"), names("trans"),
+            M0=M0, pre=incidence("pre"), post=incidence("post"),
+        )
+
+
+def load_net(filename: str, cache_dir: Optional[str] = None, use_cache: bool = True) -> PetriNet:
+    """
+    PetriNet.from_pnml with a compiled cache in front of it.
+
+    The PNML digest names the cache entry; on a hit the .npz is loaded
+    instead of parsing XML, on a miss (or an unreadable entry) the file is
+    parsed and the entry (re)written.
+
+    Args:
+        filename: Path of the PNML file.
+        cache_dir: Cache directory (default: $PN_CACHE_DIR or .pn_cache).
+        use_cache: False parses the PNML without touching the cache.
+    """
+    if not use_cache:
+        return PetriNet.from_pnml(filename)
+
+    cache_dir = DEFAULT_CACHE_DIR if cache_dir is None else cache_dir
+    path = os.path.join(cache_dir, pnml_digest(filename) + ".npz")
+
+    if os.path.exists(path):
+        try:
+            return load_net_npz(path)
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+            pass        # corrupt or outdated entry: parse again and overwrite
+
+    pn = PetriNet.from_pnml(filename)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_net(pn, path)
+    except OSError:
+        pass            # read-only location: still return the parsed net
+    return pn
@@ -1,6 +1,121 @@
 import numpy as np
 import xml.etree.ElementTree as ET
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# ---------------------------
+# Sparse incidence
+# ---------------------------
+# Real nets are very sparse: a transition touches a handful of places out of
+# thousands. The pre/post relations are therefore kept in compressed-row
+# form (the layout of a CSR matrix, without requiring SciPy): the arcs of
+# transition t are indices[indptr[t]:indptr[t+1]] with weights in data.
+
+class SparseIncidence:
+    """
+    Transitions x places arc-weight matrix in compressed-row form.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, shape: Tuple[int, int]):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.int64)
+        self.shape = shape
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[int, int]], num_places: int) -> "SparseIncidence":
+        """
+        Builds the matrix from one {place: weight} dict per transition.
+        """
+        indptr = [0]
+        indices: List[int] = []
+        data: List[int] = []
+        for row in rows:
+            for p in sorted(row):
+                if row[p]:
+                    indices.append(p)
+                    data.append(row[p])
+            indptr.append(len(indices))
+        return cls(np.array(indptr), np.array(indices), np.array(data), (len(rows), num_places))
+
+    @classmethod
+    def from_dense(cls, A: np.ndarray) -> "SparseIncidence":
+        A = np.asarray(A)
+        t_idx, p_idx = np.nonzero(A)
+        indptr = np.zeros(A.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(t_idx, minlength=A.shape[0]), out=indptr[1:])
+        return cls(indptr, p_idx, A[t_idx, p_idx], A.shape)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def row(self, t: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (places, weights) of the arcs of transition t.
+        """
+        lo, hi = self.indptr[t], self.indptr[t + 1]
+        return self.indices[lo:hi], self.data[lo:hi]
+
+    def places(self, t: int) -> List[int]:
+        """
+        Place indices of the arcs of transition t, as plain ints.
+        """
+        return self.indices[self.indptr[t]:self.indptr[t + 1]].tolist()
+
+    def max_weight(self) -> int:
+        return int(self.data.max()) if self.nnz else 0
+
+    def columns(self) -> List[List[Tuple[int, int]]]:
+        """
+        Column view: for every place, its (transition, weight) pairs.
+        """
+        cols: List[List[Tuple[int, int]]] = [[] for _ in range(self.shape[1])]
+        for t in range(self.shape[0]):
+            for p, w in zip(*(a.tolist() for a in self.row(t))):
+                cols[p].append((t, w))
+        return cols
+
+    def dot(self, F: np.ndarray) -> np.ndarray:
+        """
+        F @ A.T for a (rows x places) array F, without densifying A.
+        """
+        F = np.asarray(F)
+        out = np.zeros((len(F), self.shape[0]), dtype=np.result_type(F, self.data))
+        nonempty = np.nonzero(np.diff(self.indptr))[0]
+        if len(nonempty):
+            # One segment per non-empty transition row (empty rows in
+            # between contribute nothing to a segment)
+            prod = F[:, self.indices] * self.data
+            out[:, nonempty] = np.add.reduceat(prod, self.indptr[nonempty], axis=1)
+        return out
+
+    def expand(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Arcs of the transitions rows[k], flattened: (k, place, weight) triples
+        as three arrays, e.g. to apply a batch of firings in one step.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.indptr[rows + 1] - self.indptr[rows]
+        total = int(lengths.sum())
+        owner = np.repeat(np.arange(len(rows)), lengths)
+        # Position of every arc: its row start plus its offset in the row
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pos = self.indptr[rows][owner] + offsets
+        return owner, self.indices[pos], self.data[pos]
+
+    def toarray(self, dtype=int) -> np.ndarray:
+        A = np.zeros(self.shape, dtype=dtype)
+        t_idx = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        A[t_idx, self.indices] = self.data
+        return A
+
+    def tocsr(self):
+        """
+        SciPy CSR copy (SciPy is optional and only imported here).
+        """
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
 
 class PetriNet:
     def __init__(
@@ -9,120 +124,211 @@ class PetriNet:
         trans_ids: List[str],
         place_names: List[Optional[str]],
         trans_names: List[Optional[str]],
-        I: np.ndarray,
-        O: np.ndarray,
-        M0: np.ndarray
+        I: Optional[np.ndarray] = None,
+        O: Optional[np.ndarray] = None,
+        M0: Optional[np.ndarray] = None,
+        pre: Optional[SparseIncidence] = None,
+        post: Optional[SparseIncidence] = None,
     ):
+        """
+        The arcs are given either as dense I/O matrices (transitions x
+        places) or as SparseIncidence pre/post. The sparse form is the one
+        the analyses use; the dense one is built on first access of I/O.
+        """
         self.place_ids = place_ids
         self.trans_ids = trans_ids
         self.place_names = place_names
         self.trans_names = trans_names
-        self.I = I
-        self.O = O
+        self.pre = pre if pre is not None else SparseIncidence.from_dense(I)
+        self.post = post if post is not None else SparseIncidence.from_dense(O)
+        self._I = I
+        self._O = O
         self.M0 = M0
 
+    @property
+    def I(self) -> np.ndarray:
+        if self._I is None:
+            self._I = self.pre.toarray()
+        return self._I
+
+    @I.setter
+    def I(self, value: np.ndarray) -> None:
+        self._I = value
+        self.pre = SparseIncidence.from_dense(value)
+
+    @property
+    def O(self) -> np.ndarray:
+        if self._O is None:
+            self._O = self.post.toarray()
+        return self._O
+
+    @O.setter
+    def O(self, value: np.ndarray) -> None:
+        self._O = value
+        self.post = SparseIncidence.from_dense(value)
+
+    @property
+    def num_places(self) -> int:
+        return len(self.place_ids)
+
+    @property
+    def num_transitions(self) -> int:
+        return len(self.trans_ids)
+
+    def is_unit(self) -> bool:
+        """
+        True if every arc has weight 1 and M0 is a 0/1 vector (what the
+        1-safe engines assume).
+        """
+        return (
+            self.pre.max_weight() <= 1
+            and self.post.max_weight() <= 1
+            and not np.any(self.M0 > 1)
+        )
+
     @classmethod
     def from_pnml(cls, filename: str) -> "PetriNet":
         """
         Parses a PNML file to construct a PetriNet instance.
-        """
-        # 1. XML Parsing Setup
-        # Load the XML file into an ElementTree object
-        tree = ET.parse(filename)
-        # Get the root element of the XML tree
-        root = tree.getroot()
 
-        # Define the XML namespace URL for PNML (version 2009)
-        ns_url = "http://www.pnml.org/version-2009/grammar/pnml"
-        # Create a dictionary to map the 'pnml' prefix to the URL. 
-        # This is required for find/findall methods to locate tags correctly.
-        ns = {'pnml': ns_url}
+        The document is streamed with iterparse in a single pass: each
+        place, transition and arc is read when its closing tag arrives and
+        then dropped from the tree, so memory stays proportional to the net
+        rather than to the XML. Arc weights come from the inscriptions
+        (default 1), and the arcs are stored in sparse form.
+        """
+        # 1. Streaming setup
+        # Tags are matched on their local name, so the PNML namespace
+        # (version 2009) and un-namespaced files are both accepted
+        def local(tag: str) -> str:
+            return tag.rsplit("}", 1)[-1]
 
-        # 2. Extract Raw XML Elements
-        # Find all 'place', 'transition', and 'arc' elements anywhere in the document
-        places_xml = root.findall(".//pnml:place", ns)
-        trans_xml = root.findall(".//pnml:transition", ns)
-        arcs_xml = root.findall(".//pnml:arc", ns)
+        def child_text(elem: ET.Element, name: str) -> Optional[str]:
+            # Text of <name><text>...</text></name> directly under elem
+            for child in elem:
+                if local(child.tag) == name:
+                    for sub in child:
+                        if local(sub.tag) == "text":
+                            return sub.text
+            return None
 
-        # 3. Process Places
         place_ids = []
         place_names = []
         m0_list = []
         # Dictionary to map Place ID (string, e.g., "p1") to Matrix Index (int, e.g., 0)
         place_id_to_idx = {}
 
-        # Loop through each place element with its index (0, 1, 2...)
-        for idx, p in enumerate(places_xml):
-            # Extract the unique 'id' attribute
-            pid = p.get('id')
-            place_ids.append(pid)
-            # Map the string ID to the integer index for later matrix construction
-            place_id_to_idx[pid] = idx
-
-            # Extract the name/text tag if it exists
-            name_tag = p.find("pnml:name/pnml:text", ns)
-            # Store the name text, or None if missing
-            place_names.append(name_tag.text if name_tag is not None else None)
-
-            # Extract the initial marking (number of tokens)
-            marking_tag = p.find("pnml:initialMarking/pnml:text", ns)
-            if marking_tag is not None:
-                # If found, convert text to integer
-                m0_list.append(int(marking_tag.text))
-            else:
-                # Default to 0 tokens if not specified
-                m0_list.append(0)
-
-        # 4. Process Transitions
         trans_ids = []
         trans_names = []
         # Dictionary to map Transition ID (string, e.g., "t1") to Matrix Index (int, e.g., 0)
         trans_id_to_idx = {}
 
-        # Loop through each transition element with its index
-        for idx, t in enumerate(trans_xml):
-            tid = t.get('id')
-            trans_ids.append(tid)
-            # Map the string ID to the integer index
-            trans_id_to_idx[tid] = idx
+        # Arcs may precede the nodes they connect, so they are resolved at the end
+        raw_arcs = []
 
-            # Extract the name/text tag
-            name_tag = t.find("pnml:name/pnml:text", ns)
-            trans_names.append(name_tag.text if name_tag is not None else None)
+        # Stack of open elements, so a finished node can be detached from its parent
+        stack: List[ET.Element] = []
 
-        # 5. Initialize Matrices (Mathematical Representation)
-        num_places = len(place_ids)
-        num_trans = len(trans_ids)
+        # 2. Single pass over the document
+        for event, elem in ET.iterparse(filename, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            kind = local(elem.tag)
+
+            if kind == "place":
+                pid = elem.get("id")
+                place_id_to_idx[pid] = len(place_ids)
+                place_ids.append(pid)
+                place_names.append(child_text(elem, "name"))
+                # Initial marking (number of tokens), 0 if not specified
+                marking = child_text(elem, "initialMarking")
+                m0_list.append(int(marking) if marking is not None else 0)
 
-        # Create zero-filled matrices for Input (Pre) and Output (Post) incidence matrices.
-        # Shape: Rows = Transitions, Columns = Places
-        I = np.zeros((num_trans, num_places), dtype=int)
-        O = np.zeros((num_trans, num_places), dtype=int)
-        # Convert the initial marking list to a numpy array
-        M0 = np.array(m0_list, dtype=int)
+            elif kind == "transition":
+                tid = elem.get("id")
+                trans_id_to_idx[tid] = len(trans_ids)
+                trans_ids.append(tid)
+                trans_names.append(child_text(elem, "name"))
 
-        # 6. Process Arcs (Connectivity)
-        for arc in arcs_xml:
-            source = arc.get('source')  # The ID where the arc starts
-            target = arc.get('target')  # The ID where the arc ends
+            elif kind == "arc":
+                # Weight from <inscription><text>w</text></inscription>
+                weight = child_text(elem, "inscription")
+                raw_arcs.append((elem.get("source"), elem.get("target"),
+                                 int(weight) if weight is not None else 1))
 
+            else:
+                continue
+
+            # Free the finished node and its subtree
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+        # 3. Process Arcs (Connectivity) into one {place: weight} row per transition
+        pre_rows: List[Dict[int, int]] = [{} for _ in trans_ids]
+        post_rows: List[Dict[int, int]] = [{} for _ in trans_ids]
+
+        for source, target, weight in raw_arcs:
             # Case A: Arc from Place -> Transition (Input/Pre-condition arc)
             if source in place_id_to_idx and target in trans_id_to_idx:
-                p_idx = place_id_to_idx[source]  # Get column index for Place
-                t_idx = trans_id_to_idx[target]  # Get row index for Transition
-                # Set value to 1 in Input matrix I
-                I[t_idx, p_idx] = 1
-
+                row = pre_rows[trans_id_to_idx[target]]
+                p_idx = place_id_to_idx[source]
             # Case B: Arc from Transition -> Place (Output/Post-condition arc)
             elif source in trans_id_to_idx and target in place_id_to_idx:
-                t_idx = trans_id_to_idx[source]  # Get row index for Transition
-                p_idx = place_id_to_idx[target]  # Get column index for Place
-                # Set value to 1 in Output matrix O
-                O[t_idx, p_idx] = 1
+                row = post_rows[trans_id_to_idx[source]]
+                p_idx = place_id_to_idx[target]
+            else:
+                continue
+            # Parallel arcs add up
+            row[p_idx] = row.get(p_idx, 0) + weight
+
+        # 4. Return the constructed PetriNet instance (I/O stay lazy)
+        num_places = len(place_ids)
+        return cls(
+            place_ids, trans_ids, place_names, trans_names,
+            M0=np.array(m0_list, dtype=int),
+            pre=SparseIncidence.from_rows(pre_rows, num_places),
+            post=SparseIncidence.from_rows(post_rows, num_places),
+        )
+
+    def to_pnml(self, filename: str) -> None:
+        """
+        Writes the net as a PNML (version 2009) place/transition net, in
+        the layout from_pnml reads. Arcs of weight > 1 get an inscription.
+        """
+        ns_url = "http://www.pnml.org/version-2009/grammar/pnml"
+        root = ET.Element("pnml", xmlns=ns_url)
+        net = ET.SubElement(root, "net", id="net", type="http://www.pnml.org/version-2009/grammar/ptnet")
+        page = ET.SubElement(net, "page", id="page")
+
+        def add_name(elem: ET.Element, name: Optional[str]) -> None:
+            if name is not None:
+                ET.SubElement(ET.SubElement(elem, "name"), "text").text = name
+
+        for pid, name, tokens in zip(self.place_ids, self.place_names, self.M0.tolist()):
+            place = ET.SubElement(page, "place", id=pid)
+            add_name(place, name)
+            if tokens:
+                ET.SubElement(ET.SubElement(place, "initialMarking"), "text").text = str(tokens)
+
+        for tid, name in zip(self.trans_ids, self.trans_names):
+            add_name(ET.SubElement(page, "transition", id=tid), name)
+
+        arc_id = 0
+        for t, tid in enumerate(self.trans_ids):
+            for inc, inbound in ((self.pre, True), (self.post, False)):
+                places, weights = inc.row(t)
+                for p, w in zip(places.tolist(), weights.tolist()):
+                    source, target = (self.place_ids[p], tid) if inbound else (tid, self.place_ids[p])
+                    arc = ET.SubElement(page, "arc", id=f"a{arc_id}", source=source, target=target)
+                    arc_id += 1
+                    if w != 1:
+                        ET.SubElement(ET.SubElement(arc, "inscription"), "text").text = str(w)
 
-        # 7. Return the constructed PetriNet instance
-        return cls(place_ids, trans_ids, place_names, trans_names, I, O, M0)
-        pass
+        ET.indent(root)
+        ET.ElementTree(root).write(filename, encoding="utf-8", xml_declaration=True)
 
     def __str__(self) -> str:
         s = []
@@ -130,10 +336,14 @@ class PetriNet:
         s.append("Place names: " + str(self.place_names))
         s.append("\nTransitions: " + str(self.trans_ids))
         s.append("Transition names: " + str(self.trans_names))
-        s.append("\nI (input) matrix:")
-        s.append(str(self.I))
-        s.append("\nO (output) matrix:")
-        s.append(str(self.O))
+        if self.num_places * self.num_transitions <= 10_000:
+            s.append("\nI (input) matrix:")
+            s.append(str(self.I))
+            s.append("\nO (output) matrix:")
+            s.append(str(self.O))
+        else:
+            # Large net: do not materialize the dense matrices just to print
+            s.append(f"\nArcs: {self.pre.nnz} input, {self.post.nnz} output")
         s.append("\nInitial marking M0:")
         s.append(str(self.M0))
-        return "\n".join(s)
\ No newline at end of file
+        return "\n".join(s)
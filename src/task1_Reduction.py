@@ -0,0 +1,484 @@
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from .task1_PetriNet import PetriNet, SparseIncidence
+
+# ---------------------------
+# Structural invariants
+# ---------------------------
+# Invariants are the minimal semi-positive solutions of the incidence
+# equations, found with the Farkas algorithm: the columns of the incidence
+# matrix are eliminated one by one by combining rows of opposite sign, and
+# rows with a non-minimal support are dropped. The number of rows can grow
+# exponentially, so the algorithm gives up (returns None) past max_rows.
+
+def farkas(D: np.ndarray, max_rows: int = 1000) -> Optional[np.ndarray]:
+    """
+    Minimal-support non-negative integer vectors y with y @ D = 0.
+
+    Args:
+        D: (n x m) integer matrix.
+        max_rows: Bound on intermediate rows; None is returned beyond it.
+
+    Returns:
+        np.ndarray: (k x n) array, one invariant per row (entries coprime),
+                    or None if the bound was hit.
+    """
+    D = np.asarray(D, dtype=np.int64)
+    n = D.shape[0]
+    if n > max_rows:
+        # Already past the bound before the first step
+        return None
+    # Rows of [D | identity]: the identity part Y records the combination,
+    # and supports[k] is the support of Y[k] as a bitmask. All-zero columns
+    # (e.g. self-loop transitions) constrain nothing and are left out
+    A = D[:, np.any(D, axis=0)]
+    Y = np.eye(n, dtype=np.int64)
+    supports = [1 << i for i in range(n)]
+
+    while A.shape[1]:
+        # Eliminate the column that creates the fewest combinations (all
+        # zero columns first), then drop it
+        pos_count = (A > 0).sum(axis=0)
+        neg_count = (A < 0).sum(axis=0)
+        j = int(np.argmin(pos_count * neg_count - pos_count - neg_count))
+        column = A[:, j].copy()
+        A = np.delete(A, j, axis=1)
+        if not pos_count[j] and not neg_count[j]:
+            continue
+
+        zero = np.nonzero(column == 0)[0]
+        pos, neg = np.nonzero(column > 0)[0], np.nonzero(column < 0)[0]
+        if len(pos) * len(neg) > 10 * max_rows:
+            return None
+        # Every positive row with every negative one, so that column j cancels
+        a, b = np.repeat(pos, len(neg)), np.tile(neg, len(pos))
+        fa, fb = -column[b][:, None], column[a][:, None]
+        new_A = fa * A[a] + fb * A[b]
+        new_Y = fa * Y[a] + fb * Y[b]
+        g = np.gcd.reduce(np.concatenate([new_A, new_Y], axis=1), axis=1)[:, None]
+        g[g == 0] = 1
+        new_supports = [supports[x] | supports[z] for x, z in zip(a.tolist(), b.tolist())]
+
+        old, new = _minimal_supports([supports[k] for k in zero.tolist()], new_supports)
+        A = np.concatenate([A[zero[old]], (new_A // g)[new]])
+        Y = np.concatenate([Y[zero[old]], (new_Y // g)[new]])
+        supports = [supports[k] for k in zero[old].tolist()] + [new_supports[k] for k in new]
+        if len(A) > max_rows:
+            return None
+    return Y
+
+
+def _minimal_supports(old: List[int], new: List[int]) -> Tuple[List[int], List[int]]:
+    # Indices of the old and new rows to keep: a new row is dropped if its
+    # support contains another kept one (the old rows are minimal among
+    # themselves), an old row if it strictly contains a new one
+    kept_new: List[int] = []
+    chosen: List[int] = []
+    for k in sorted(range(len(new)), key=lambda k: bin(new[k]).count("1")):
+        s = new[k]
+        if not any(t & s == t for t in old) and not any(t & s == t for t in chosen):
+            chosen.append(s)
+            kept_new.append(k)
+    kept_old = [q for q, s in enumerate(old) if not any(t & s == t and t != s for t in chosen)]
+    return kept_old, kept_new
+
+
+def _incidence(pn: PetriNet) -> np.ndarray:
+    # (transitions x places) effect of firing, O - I, built from the sparse
+    # rows in a single dense array
+    C = np.zeros((pn.num_transitions, pn.num_places), dtype=np.int64)
+    for inc, sign in ((pn.post, 1), (pn.pre, -1)):
+        t_idx = np.repeat(np.arange(pn.num_transitions), np.diff(inc.indptr))
+        np.add.at(C, (t_idx, inc.indices), sign * inc.data)
+    return C
+
+
+def p_invariants(pn: PetriNet, max_rows: int = 1000) -> Optional[np.ndarray]:
+    """
+    Minimal semi-positive P-invariants: y >= 0 with (O - I) @ y = 0, so
+    y·M = y·M0 for every reachable marking M. (k x places), or None if the
+    Farkas algorithm exceeded max_rows.
+    """
+    # One starting row per place: a bigger net is given up on before its
+    # incidence matrix is built
+    if pn.num_places > max_rows:
+        return None
+    return farkas(_incidence(pn).T, max_rows)
+
+
+def t_invariants(pn: PetriNet, max_rows: int = 1000) -> Optional[np.ndarray]:
+    """
+    Minimal semi-positive T-invariants: x >= 0 with x @ (O - I) = 0, i.e.
+    firing counts that reproduce a marking. (k x transitions), or None if
+    the Farkas algorithm exceeded max_rows.
+    """
+    if pn.num_transitions > max_rows:
+        return None
+    return farkas(_incidence(pn), max_rows)
+
+
+# ---------------------------
+# Net reduction
+# ---------------------------
+# Rules, applied to a fixpoint on a 1-safe net with unit arcs:
+#   - dead transitions: a transition with an input in the largest initially
+#     empty siphon can never fire; the siphon's places stay empty.
+#   - constant places: a marked place that no transition empties stays
+#     marked; its self-loop arcs are dropped and transitions that would put
+#     a second token there (1-safe property) are dead.
+#   - implied places: a place whose marking follows from a P-invariant
+#     (M[p] = y·M0 - sum of y_q M[q]) and whose every guard (input, or
+#     output-only place that blocks the transition) already follows from
+#     the transition's other guards under that invariant.
+#   - series agglomeration (optional): a transition h whose only input p is
+#     consumed by h alone, and whose outputs are never marked together with
+#     p (by a P-invariant), is fired right after every producer of p. This
+#     covers both series-place and series-transition fusion.
+# The first three keep the reachable set exactly (lifting is a bijection).
+# Agglomeration drops the markings in which a fused place holds the token:
+# the lifted reachable set is the original one restricted to markings with
+# all fused places empty, which keeps every deadlock.
+
+class Reduction:
+    """
+    A reduced net and how to map its markings and firings back.
+
+    Attributes:
+        net: The reduced PetriNet (analyse this one).
+        original: The net it was reduced from.
+        place_map: Original index of every place of `net`.
+        trans_map: Original transition indices fired by every transition of
+                   `net`, in firing order (one entry unless agglomerated).
+        constants: Removed places with a fixed marking {place: tokens}.
+        implied: Removed implied places in removal order, as
+                 (place, constant, {place: weight}) meaning
+                 M[place] = constant - sum(weight * M[q]).
+        fused: Places removed by agglomeration (empty in every lifted marking).
+        dead: Original indices of the transitions found dead.
+        p_invariants / t_invariants: Minimal semi-positive invariants of the
+                 original net (None if too many to enumerate; T-invariants
+                 only on request).
+    """
+
+    def __init__(self, original: PetriNet):
+        self.original = original
+        self.net = original
+        self.place_map: List[int] = list(range(original.num_places))
+        self.trans_map: List[List[int]] = [[t] for t in range(original.num_transitions)]
+        self.constants: Dict[int, int] = {}
+        self.implied: List[Tuple[int, int, Dict[int, int]]] = []
+        self.fused: List[int] = []
+        self.dead: List[int] = []
+        self.p_invariants: Optional[np.ndarray] = None
+        self.t_invariants: Optional[np.ndarray] = None
+
+    @property
+    def exact(self) -> bool:
+        """
+        True if the lifted reachable set is exactly the original one.
+        """
+        return not self.fused
+
+    def lift(self, marking: Sequence[int]) -> Tuple[int, ...]:
+        """
+        Marking of the reduced net -> marking of the original net.
+        """
+        M = [0] * self.original.num_places
+        for i, tokens in zip(self.place_map, marking):
+            M[i] = int(tokens)
+        for p, tokens in self.constants.items():
+            M[p] = tokens
+        # Each formula only uses places kept or removed after it, so undo
+        # the removals last to first
+        for p, k, weights in reversed(self.implied):
+            M[p] = k - sum(w * M[q] for q, w in weights.items())
+        return tuple(M)
+
+    def lift_markings(self, markings: Iterable[Sequence[int]]) -> Iterator[Tuple[int, ...]]:
+        """
+        Lazily lifts many markings (e.g. a BFS set or iter_markings).
+        """
+        for marking in markings:
+            yield self.lift(marking)
+
+    def lift_sequence(self, trans_ids: Sequence[str]) -> List[str]:
+        """
+        Firing sequence of the reduced net (transition ids) -> firing
+        sequence of the original net.
+        """
+        index = {tid: t for t, tid in enumerate(self.net.trans_ids)}
+        ids = self.original.trans_ids
+        return [ids[o] for tid in trans_ids for o in self.trans_map[index[tid]]]
+
+    def reduce_objective(self, c: Sequence[float]) -> Tuple[np.ndarray, float]:
+        """
+        Rewrites c·M over the original places as c'·M' + offset over the
+        reduced ones (only for exact reductions).
+
+        Returns:
+            Tuple: (c_reduced, offset)
+        """
+        if not self.exact:
+            raise ValueError("Agglomerated nets do not preserve c·M; reduce without agglomerate")
+        num_places = self.original.num_places
+        # One weight per original place (extra entries ignored, missing ones 0)
+        given = np.asarray(c)[:num_places]
+        c = np.zeros(num_places, dtype=np.result_type(given, np.int64))
+        c[:len(given)] = given
+        offset = c.dtype.type(0)
+        # Substitute implied places first to last: each one's formula only
+        # uses places removed after it (or kept)
+        for p, k, weights in self.implied:
+            offset += c[p] * k
+            for q, w in weights.items():
+                c[q] -= c[p] * w
+            c[p] = 0
+        for p, tokens in self.constants.items():
+            offset += c[p] * tokens
+        return c[self.place_map], offset.item()
+
+    def summary(self) -> str:
+        before, after = self.original, self.net
+        s = [f"Places: {before.num_places} -> {after.num_places}, "
+             f"transitions: {before.num_transitions} -> {after.num_transitions}"]
+        s.append(f"Dead transitions: {len(self.dead)}, constant places: {len(self.constants)}, "
+                 f"implied places: {len(self.implied)}, fused places: {len(self.fused)}")
+        s.append("P-invariants: " + ("not enumerated" if self.p_invariants is None
+                                     else str(len(self.p_invariants))))
+        if self.t_invariants is not None:
+            s.append(f"T-invariants: {len(self.t_invariants)}")
+        return "\n".join(s)
+
+
+class _Working:
+    """
+    Mutable 1-safe net over the original place indices. Transitions are
+    keyed by the original index of the first transition they fire.
+    """
+
+    def __init__(self, pn: PetriNet):
+        self.pn = pn
+        self.M0 = [int(v) for v in pn.M0]
+        self.places: Set[int] = set(range(pn.num_places))
+        self.pre: Dict[int, Set[int]] = {t: set(pn.pre.places(t)) for t in range(pn.num_transitions)}
+        self.post: Dict[int, Set[int]] = {t: set(pn.post.places(t)) for t in range(pn.num_transitions)}
+        self.seq: Dict[int, List[int]] = {t: [t] for t in range(pn.num_transitions)}
+
+    def build(self) -> PetriNet:
+        pn = self.pn
+        places = sorted(self.places)
+        trans = sorted(self.pre)
+        index = {p: i for i, p in enumerate(places)}
+
+        def rows(arcs):
+            return SparseIncidence.from_rows([{index[p]: 1 for p in arcs[t]} for t in trans], len(places))
+
+        return PetriNet(
+            [pn.place_ids[p] for p in places],
+            [pn.trans_ids[t] for t in trans],
+            [pn.place_names[p] for p in places],
+            # A fused transition is named after the firings it stands for
+            ["+".join(str(pn.trans_names[o]) for o in self.seq[t]) if len(self.seq[t]) > 1
+             else pn.trans_names[t] for t in trans],
+            M0=np.array([self.M0[p] for p in places], dtype=int),
+            pre=rows(self.pre),
+            post=rows(self.post),
+        )
+
+    def remove_transition(self, t: int) -> None:
+        del self.pre[t], self.post[t], self.seq[t]
+
+    def remove_place(self, p: int) -> None:
+        self.places.discard(p)
+        for t in self.pre:
+            self.pre[t].discard(p)
+            self.post[t].discard(p)
+
+    def invariants(self, max_rows: int) -> Optional[List[Dict[int, int]]]:
+        """
+        P-invariants of the current net as {original place: weight} dicts.
+        """
+        if len(self.places) > max_rows:
+            return None
+        Y = p_invariants(self.build(), max_rows)
+        if Y is None:
+            return None
+        places = sorted(self.places)
+        return [{places[i]: int(y[i]) for i in np.nonzero(y)[0]} for y in Y]
+
+    def remove_dead_and_constant(self, red: Reduction) -> bool:
+        changed = False
+        while True:
+            # Largest siphon of unmarked places: drop the outputs of every
+            # transition that can fire without taking a token from it
+            empty = {p for p in self.places if not self.M0[p]}
+            shrinking = True
+            while shrinking:
+                shrinking = False
+                for t in self.pre:
+                    if not self.pre[t] & empty and self.post[t] & empty:
+                        empty -= self.post[t]
+                        shrinking = True
+
+            emptied = set()
+            for t in self.pre:
+                emptied |= self.pre[t] - self.post[t]
+            marked = {p for p in self.places if self.M0[p] and p not in emptied}
+
+            dead = [t for t in self.pre
+                    if self.pre[t] & empty or (self.post[t] - self.pre[t]) & marked]
+            gone = empty | marked
+            if gone == self.places:
+                # The engines need at least one place
+                gone.discard(min(gone))
+            if not gone and not dead:
+                return changed
+
+            for t in dead:
+                red.dead.append(self.seq[t][0])
+                self.remove_transition(t)
+            for p in gone:
+                red.constants[p] = self.M0[p]
+                self.remove_place(p)
+            changed = True
+
+    def remove_implied(self, red: Reduction, invariants: List[Dict[int, int]]) -> bool:
+        changed = False
+        for p in sorted(self.places):
+            if len(self.places) == 1:
+                break
+            guards = [t for t in self.pre if p in self.pre[t] or p in self.post[t]]
+            for y in invariants:
+                if y.get(p) == 1 and self._guards_implied(p, y, guards):
+                    weights = {q: w for q, w in y.items() if q != p}
+                    red.implied.append((p, sum(w * self.M0[q] for q, w in y.items()), weights))
+                    self.remove_place(p)
+                    # The others no longer hold once p is gone
+                    invariants[:] = [z for z in invariants if p not in z]
+                    changed = True
+                    break
+        return changed
+
+    def _guards_implied(self, p: int, y: Dict[int, int], guards: List[int]) -> bool:
+        # With the other guards of t fixed, M[p] = k - fixed - free where
+        # the free places of the invariant contribute anything in [0, free]
+        k = sum(w * self.M0[q] for q, w in y.items())
+        for t in guards:
+            pre, block = self.pre[t], self.post[t] - self.pre[t]
+            fixed = sum(w for q, w in y.items() if q != p and q in pre)
+            free = sum(w for q, w in y.items() if q != p and q not in pre and q not in block)
+            if k - fixed < 0:
+                continue        # the other guards never hold together
+            if p in pre and k - fixed - free < 1:
+                return False
+            if p in block and k - fixed > 0:
+                return False
+        return True
+
+    def agglomerate(self, red: Reduction, invariants: List[Dict[int, int]]) -> bool:
+        changed = False
+        consts = [sum(w * self.M0[q] for q, w in y.items()) for y in invariants]
+
+        def exclusive(p, q):
+            # Some invariant rules out M[p] = M[q] = 1
+            return any(y.get(p, 0) and y.get(q, 0) and y[p] + y[q] > k
+                       for y, k in zip(invariants, consts))
+
+        for h in sorted(self.pre):
+            if h not in self.pre or len(self.pre[h]) != 1 or len(self.places) == 1:
+                continue
+            (p,) = self.pre[h]
+            if self.M0[p] or p in self.post[h]:
+                continue
+            if any(p in self.pre[t] for t in self.pre if t != h):
+                continue
+            producers = [u for u in self.pre if p in self.post[u]]
+            if not producers:
+                continue
+            # A producer already making one of h's outputs would need 2 tokens
+            if any((self.post[u] - {p}) & self.post[h] for u in producers):
+                continue
+            if not all(exclusive(p, q) for q in self.post[h]):
+                continue
+
+            for u in producers:
+                self.post[u] = (self.post[u] - {p}) | self.post[h]
+                self.seq[u] = self.seq[u] + self.seq[h]
+            self.remove_transition(h)
+            self.remove_place(p)
+            red.fused.append(p)
+            # M[p] = 0 in every marking kept, so p just drops out (k unchanged)
+            for y in invariants:
+                y.pop(p, None)
+            changed = True
+        return changed
+
+
+def reduce_net(
+    pn: PetriNet,
+    agglomerate: bool = False,
+    max_rows: int = 1000,
+    stats: Optional[Dict[str, Any]] = None,
+    with_t_invariants: bool = False,
+) -> Reduction:
+    """
+    Structural reduction of a 1-safe net before state-space exploration.
+
+    Args:
+        pn (PetriNet): The net (nets with weights or M0 > 1 are returned
+                       unreduced).
+        agglomerate (bool): Also fuse series places/transitions. Reachable
+                            markings are then only kept with the fused
+                            places empty; deadlocks are all kept.
+        max_rows (int): Farkas row bound (see farkas). Nets with more places
+                        skip the invariants, and with them the implied-place
+                        and agglomeration rules, so large nets stay cheap.
+        stats (dict): Optional dict filled with "places", "transitions" (of
+                      the reduced net), "dead", "constant", "implied",
+                      "fused", "p_invariants", "t_invariants", "passes" and
+                      "time".
+        with_t_invariants (bool): Also enumerate the T-invariants (reported
+                                  only; no rule uses them).
+
+    Returns:
+        Reduction: The reduced net and the mapping back to pn.
+    """
+    start_t = time.perf_counter()
+    red = Reduction(pn)
+    red.p_invariants = p_invariants(pn, max_rows)
+    if with_t_invariants:
+        red.t_invariants = t_invariants(pn, max_rows)
+    passes = 0
+
+    if pn.is_unit():
+        work = _Working(pn)
+        changed = True
+        while changed:
+            passes += 1
+            changed = work.remove_dead_and_constant(red)
+            # Recomputed once the net changed: removed transitions add invariants
+            if passes == 1 and not changed and red.p_invariants is not None:
+                invariants = [{int(p): int(y[p]) for p in np.nonzero(y)[0]} for y in red.p_invariants]
+            else:
+                invariants = work.invariants(max_rows)
+            if invariants is not None:
+                changed |= work.remove_implied(red, invariants)
+                if agglomerate:
+                    changed |= work.agglomerate(red, invariants)
+        red.net = work.build()
+        red.place_map = sorted(work.places)
+        red.trans_map = [work.seq[t] for t in sorted(work.pre)]
+
+    if stats is not None:
+        stats["places"] = red.net.num_places
+        stats["transitions"] = red.net.num_transitions
+        stats["dead"] = len(red.dead)
+        stats["constant"] = len(red.constants)
+        stats["implied"] = len(red.implied)
+        stats["fused"] = len(red.fused)
+        stats["p_invariants"] = None if red.p_invariants is None else len(red.p_invariants)
+        stats["t_invariants"] = None if red.t_invariants is None else len(red.t_invariants)
+        stats["passes"] = passes
+        stats["time"] = time.perf_counter() - start_t
+    return red
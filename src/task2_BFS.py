@@ -1,9 +1,14 @@
 from collections import deque
+import time
 import numpy as np
-from .task1_PetriNet import PetriNet
-from typing import Set, Tuple
+from .task1_PetriNet import PetriNet, SparseIncidence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-def bfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
+def bfs_reachable(
+    pn: PetriNet,
+    engine: str = "tuple",
+    stats: Optional[Dict[str, Any]] = None,
+) -> Set[Tuple[int, ...]]:
     """
     Computes the set of reachable markings using Breadth-First Search (BFS).
     
@@ -14,12 +19,31 @@ def bfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
     Args:
         pn (PetriNet): The Petri net model containing structure (I, O matrices)
                        and initial state (M0).
+        engine (str): "tuple" explores with NumPy vectors (original engine),
+                      "bitset" explores packed integer markings
+                      (see bfs_reachable_packed) and converts at the end,
+                      "frontier" expands one BFS level per step as a 2-D
+                      array (see bfs_reachable_frontier).
+        stats (dict): Optional dict filled with "states", "fired"
+                      (transitions fired, i.e. successors generated),
+                      "time" and "states_per_sec".
                        
     Returns:
         Set[Tuple[int, ...]]: A set of unique reachable markings, where each
                               marking is represented as a tuple of integers.
     """
+    if engine == "bitset":
+        num_places = len(pn.place_ids)
+        return set(unpack_markings(bfs_reachable_packed(pn, stats), num_places))
+    if engine == "frontier":
+        markings, _ = bfs_reachable_frontier(pn, stats=stats)
+        return set(map(tuple, markings.tolist()))
+    if engine != "tuple":
+        raise ValueError(f"Unknown BFS engine: {engine}")
     
+    start_t = time.perf_counter()
+    fired = 0
+
     # Initialize the set of visited markings to avoid infinite loops
     visited = set()
     m0_tuple = tuple(pn.M0)
@@ -29,8 +53,9 @@ def bfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
     # deque is optimized for fast appends and pops from both ends
     queue = deque([pn.M0])
     
-    # Cache the total number of transitions
-    num_transitions = len(pn.I)
+    # Cache the arcs of every transition (sparse: only the places it touches)
+    num_transitions = pn.num_transitions
+    arcs = [pn.pre.row(t) + pn.post.row(t) for t in range(num_transitions)]
     
     while queue:
         # Dequeue the oldest marking (Breadth-First strategy)
@@ -38,15 +63,16 @@ def bfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
         
         # Explore all possible transitions from the current state
         for t in range(num_transitions):
-            # Get the input (consumption) and output (production) vectors
-            input_vector = pn.I[t]
-            output_vector = pn.O[t]
+            # Get the input (consumption) and output (production) arcs
+            in_places, in_weights, out_places, out_weights = arcs[t]
             
             # Check enabling condition: Are there enough tokens in input places?
-            if np.all(current_m >= input_vector):
+            if np.all(current_m[in_places] >= in_weights):
                 # Calculate the resulting marking after firing transition t
                 # Equation: M_next = M_curr - I[t] + O[t]
-                next_m = current_m - input_vector + output_vector
+                next_m = current_m.copy()
+                next_m[in_places] -= in_weights
+                next_m[out_places] += out_weights
                 
                 # --- Constraint Check: 1-Safe Property ---
                 # Ensure the net remains 1-safe (max 1 token per place).
@@ -54,6 +80,7 @@ def bfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
                 if np.any(next_m > 1):
                     continue
                 # -----------------------------------------
+                fired += 1
 
                 # Hashable representation for set storage
                 next_m_tuple = tuple(next_m)
@@ -62,5 +89,270 @@ def bfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
                 if next_m_tuple not in visited:
                     visited.add(next_m_tuple)
                     queue.append(next_m)
-                    
-    return visited
\ No newline at end of file
+
+    if stats is not None:
+        _record_bfs_stats(stats, len(visited), fired, time.perf_counter() - start_t)
+    return visited
+
+
+def _record_bfs_stats(stats: Dict[str, Any], states: int, fired: int, elapsed: float) -> None:
+    stats["states"] = states
+    stats["fired"] = fired
+    stats["time"] = elapsed
+    stats["states_per_sec"] = states / elapsed if elapsed > 0 else float("inf")
+
+
+# ---------------------------
+# Bitset engine
+# ---------------------------
+# A 1-safe marking is a bit vector, so it is stored as a Python int where
+# bit i is the token of place i. Python ints have arbitrary width, so nets
+# wider than 64 places need no special handling, and an int costs far less
+# memory than a tuple of NumPy scalars in the visited set.
+
+def pack_marking(marking: Iterable[int]) -> int:
+    """
+    Packs a 0/1 marking vector into an int (bit i = place i).
+    """
+    code = 0
+    for i, tokens in enumerate(marking):
+        if tokens:
+            code |= 1 << i
+    return code
+
+
+def unpack_marking(code: int, num_places: int) -> Tuple[int, ...]:
+    """
+    Converts a packed marking back to the tuple form used by bfs_reachable.
+    """
+    return tuple((code >> i) & 1 for i in range(num_places))
+
+
+def unpack_markings(codes: Iterable[int], num_places: int) -> Iterator[Tuple[int, ...]]:
+    """
+    Lazily converts packed markings back to tuples (on demand).
+    """
+    for code in codes:
+        yield unpack_marking(code, num_places)
+
+
+def compile_masks(pn: PetriNet) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Precompiles the sparse pre/post arcs into per-transition bit masks.
+
+    Returns:
+        Tuple: (pre, post, block)
+            - pre[t]:   places consumed by t (must all be marked to fire).
+            - post[t]:  places produced by t.
+            - block[t]: output-only places of t; if one of them is already
+                        marked, firing t would put 2 tokens there and break
+                        the 1-safe property.
+    """
+    if not pn.is_unit():
+        raise ValueError("Bitset engine requires a 1-safe net with unit arcs")
+
+    pre = [sum(1 << p for p in pn.pre.places(t)) for t in range(pn.num_transitions)]
+    post = [sum(1 << p for p in pn.post.places(t)) for t in range(pn.num_transitions)]
+    block = [post[t] & ~pre[t] for t in range(len(pre))]
+    return pre, post, block
+
+
+def bfs_reachable_packed(pn: PetriNet, stats: Optional[Dict[str, Any]] = None) -> Set[int]:
+    """
+    Bitset BFS: same exploration as bfs_reachable, on packed int markings.
+
+    Enabledness of a transition is a single AND over the whole marking and
+    firing is one AND-NOT/OR, instead of NumPy calls per transition.
+
+    Args:
+        stats (dict): Optional, filled as in bfs_reachable.
+
+    Returns:
+        Set[int]: The reachable markings, packed (see unpack_markings).
+    """
+    start_t = time.perf_counter()
+    fired = 0
+    pre, post, block = compile_masks(pn)
+    # Transitions are zipped once so the inner loop only touches locals
+    masks = list(zip(pre, post, block))
+
+    m0 = pack_marking(pn.M0)
+    visited = {m0}
+    queue = deque([m0])
+
+    while queue:
+        current_m = queue.popleft()
+
+        for pre_t, post_t, block_t in masks:
+            # Enabled: every input place is marked
+            if current_m & pre_t != pre_t:
+                continue
+            # 1-safe: no output-only place may already hold a token
+            if current_m & block_t:
+                continue
+
+            # M_next = M_curr - I[t] + O[t]
+            next_m = (current_m & ~pre_t) | post_t
+            fired += 1
+
+            if next_m not in visited:
+                visited.add(next_m)
+                queue.append(next_m)
+
+    if stats is not None:
+        _record_bfs_stats(stats, len(visited), fired, time.perf_counter() - start_t)
+    return visited
+
+
+def bfs_stream(pn: PetriNet, packed: bool = False) -> Iterator:
+    """
+    Bitset BFS as a generator: each reachable marking is yielded as soon as
+    it is discovered (M0 first, then level by level).
+
+    Only the packed visited set and the queue are kept; the consumer never
+    has to hold the markings themselves, so filters and aggregates over the
+    state space run without a second full copy.
+
+    Args:
+        pn (PetriNet): A 1-safe Petri net with unit arcs.
+        packed (bool): Yield packed ints instead of tuples.
+    """
+    pre, post, block = compile_masks(pn)
+    masks = list(zip(pre, post, block))
+    num_places = len(pn.place_ids)
+    out = (lambda code: code) if packed else (lambda code: unpack_marking(code, num_places))
+
+    m0 = pack_marking(pn.M0)
+    visited = {m0}
+    queue = deque([m0])
+    yield out(m0)
+
+    while queue:
+        current_m = queue.popleft()
+        for pre_t, post_t, block_t in masks:
+            if current_m & pre_t != pre_t or current_m & block_t:
+                continue
+            next_m = (current_m & ~pre_t) | post_t
+            if next_m not in visited:
+                visited.add(next_m)
+                queue.append(next_m)
+                yield out(next_m)
+
+
+# ---------------------------
+# Frontier-batched engine
+# ---------------------------
+# Each BFS level is handled as one 2-D array: enabledness for the whole
+# (frontier x transitions) grid is a single matrix product, successors are
+# built in bulk, and duplicates are removed with sorted-array set operations
+# on packed rows instead of one tuple lookup per successor.
+
+def _row_keys(rows: np.ndarray) -> np.ndarray:
+    """
+    Packs 0/1 marking rows into fixed-width byte strings usable with
+    np.unique / np.searchsorted.
+    """
+    packed = np.packbits(rows, axis=1, bitorder="little")
+    packed = np.ascontiguousarray(packed)
+    return packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+
+
+def _keys_to_rows(keys: np.ndarray, num_places: int) -> np.ndarray:
+    """
+    Inverse of _row_keys.
+    """
+    packed = np.frombuffer(keys.tobytes(), dtype=np.uint8).reshape(len(keys), -1)
+    return np.unpackbits(packed, axis=1, count=num_places, bitorder="little")
+
+
+# Budget (in array entries) for the per-batch temporaries of the frontier BFS
+_BATCH_ELEMENTS = 1 << 22
+
+
+def bfs_reachable_frontier(
+    pn: PetriNet,
+    batch_size: Optional[int] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Tuple[np.ndarray, List[int]]:
+    """
+    Level-synchronous BFS that expands a whole frontier per step with NumPy.
+
+    Args:
+        pn (PetriNet): A 1-safe Petri net with unit arcs.
+        batch_size (int): Maximum number of frontier rows expanded at once.
+                          Larger batches are faster but the temporary
+                          (batch x nnz) products grow with it. Defaults
+                          to keeping them around _BATCH_ELEMENTS entries.
+        stats (dict): Optional, filled as in bfs_reachable plus "levels".
+
+    Returns:
+        Tuple: (markings, level_sizes)
+            - markings: (N x places) uint8 array of all reachable markings,
+                        sorted by their packed key.
+            - level_sizes: Number of new markings discovered at each BFS
+                           level (level 0 is M0).
+    """
+    if not pn.is_unit():
+        raise ValueError("Frontier engine requires a 1-safe net with unit arcs")
+
+    num_places = len(pn.place_ids)
+    pre, post = pn.pre, pn.post
+    # Output-only places per transition: marked ones block t (1-safe property)
+    block = SparseIncidence.from_rows(
+        [dict.fromkeys(set(post.places(t)) - set(pre.places(t)), 1)
+         for t in range(pn.num_transitions)],
+        num_places,
+    )
+    needed = np.diff(pre.indptr)      # number of input places per transition
+    if batch_size is None:
+        widest = max(pre.nnz, block.nnz, pn.num_transitions, 1)
+        batch_size = max(1, _BATCH_ELEMENTS // widest)
+
+    start_t = time.perf_counter()
+    fired = 0
+    frontier = pn.M0.astype(np.uint8)[None, :]
+    visited_keys = _row_keys(frontier)
+    level_sizes = [1]
+
+    while len(frontier):
+        successors = []
+        for start in range(0, len(frontier), batch_size):
+            F = frontier[start:start + batch_size].astype(np.int32)
+
+            # (frontier x transitions): all input places marked and
+            # no output-only place marked (1-safe property)
+            enabled = (pre.dot(F) == needed) & (block.dot(F) == 0)
+            f_idx, t_idx = np.nonzero(enabled)
+            fired += len(f_idx)
+            if len(f_idx):
+                # Fire: clear the input places, then set the output places
+                succ = F[f_idx]
+                row, place, _ = pre.expand(t_idx)
+                succ[row, place] = 0
+                row, place, _ = post.expand(t_idx)
+                succ[row, place] = 1
+                successors.append(succ.astype(np.uint8))
+
+        if not successors:
+            break
+
+        # Deduplicate inside the level, then against everything visited
+        keys = np.unique(_row_keys(np.concatenate(successors)))
+        pos = np.searchsorted(visited_keys, keys)
+        seen = np.zeros(len(keys), dtype=bool)
+        in_range = pos < len(visited_keys)
+        seen[in_range] = visited_keys[pos[in_range]] == keys[in_range]
+        new_keys = keys[~seen]
+
+        if len(new_keys) == 0:
+            break
+
+        level_sizes.append(len(new_keys))
+        # Both arrays are sorted: merge by insertion instead of re-sorting
+        visited_keys = np.insert(visited_keys, pos[~seen], new_keys)
+        frontier = _keys_to_rows(new_keys, num_places)
+
+    if stats is not None:
+        _record_bfs_stats(stats, len(visited_keys), fired, time.perf_counter() - start_t)
+        stats["levels"] = len(level_sizes)
+    return _keys_to_rows(visited_keys, num_places), level_sizes
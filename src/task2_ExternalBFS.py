@@ -0,0 +1,256 @@
+import heapq
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+from .task1_PetriNet import PetriNet
+from .task2_BFS import compile_masks, pack_marking, unpack_marking
+
+# ---------------------------
+# On-disk runs
+# ---------------------------
+# A run is a file of packed markings sorted in increasing order. Each
+# marking is stored as a fixed-width big-endian byte string, so the byte
+# order of the file is also the numeric order of the packed ints. Runs are
+# read back through np.memmap in chunks, so only one chunk per open run is
+# resident at a time.
+
+def _write_run(path: str, codes: Iterable[int], nbytes: int) -> int:
+    """
+    Writes already sorted packed markings to path. Returns the count.
+    """
+    count = 0
+    with open(path, "wb") as f:
+        chunk = []
+        for code in codes:
+            chunk.append(code.to_bytes(nbytes, "big"))
+            if len(chunk) >= 65536:
+                f.write(b"".join(chunk))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            f.write(b"".join(chunk))
+            count += len(chunk)
+    return count
+
+
+def _iter_run(path: str, nbytes: int, chunk: int = 65536) -> Iterator[int]:
+    """
+    Streams the packed markings of a run in sorted order.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    step = chunk * nbytes
+    for start in range(0, len(data), step):
+        buf = data[start:start + step].tobytes()
+        for off in range(0, len(buf), nbytes):
+            yield int.from_bytes(buf[off:off + nbytes], "big")
+    del data
+
+
+def _merge_unique(streams: List[Iterator[int]]) -> Iterator[int]:
+    """
+    K-way merge of sorted streams, dropping duplicates.
+    """
+    last = None
+    for code in heapq.merge(*streams):
+        if code != last:
+            yield code
+            last = code
+
+
+class ExternalStateSet:
+    """
+    Set of packed markings stored as sorted runs on disk.
+
+    Iterating yields every marking exactly once, in increasing packed order,
+    by merging the runs lazily; the set is never loaded into memory whole.
+    """
+
+    def __init__(self, num_places: int, workdir: Optional[str] = None):
+        self.num_places = num_places
+        # Fixed width in bytes of one packed marking
+        self.nbytes = max(1, (num_places + 7) // 8)
+        self._own_dir = workdir is None
+        self.workdir = tempfile.mkdtemp(prefix="pn_bfs_") if workdir is None else workdir
+        os.makedirs(self.workdir, exist_ok=True)
+        self.runs: List[str] = []
+        self.count = 0
+        self.level_sizes: List[int] = []
+        self._next_id = 0
+
+    def new_path(self, kind: str) -> str:
+        path = os.path.join(self.workdir, f"{kind}_{self._next_id:06d}.run")
+        self._next_id += 1
+        return path
+
+    def add_run(self, path: str, count: int) -> None:
+        """
+        Registers a sorted run of markings that are not in the set yet.
+        """
+        self.runs.append(path)
+        self.count += count
+
+    def compact(self) -> None:
+        """
+        Merges all runs into one, so membership scans stay cheap.
+        """
+        if len(self.runs) <= 1:
+            return
+        path = self.new_path("visited")
+        _write_run(path, _merge_unique([_iter_run(r, self.nbytes) for r in self.runs]), self.nbytes)
+        for r in self.runs:
+            os.remove(r)
+        self.runs = [path]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[int]:
+        return _merge_unique([_iter_run(r, self.nbytes) for r in self.runs])
+
+    def markings(self) -> Iterator[Tuple[int, ...]]:
+        """
+        Streams the markings in tuple form.
+        """
+        for code in self:
+            yield unpack_marking(code, self.num_places)
+
+    def close(self) -> None:
+        """
+        Deletes the runs (and the working directory if it was created here).
+        """
+        if self._own_dir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        else:
+            for r in self.runs:
+                if os.path.exists(r):
+                    os.remove(r)
+        self.runs = []
+
+    def __enter__(self) -> "ExternalStateSet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ---------------------------
+# External-memory BFS
+# ---------------------------
+
+def bfs_reachable_external(
+    pn: PetriNet,
+    workdir: Optional[str] = None,
+    cache_size: int = 1_000_000,
+    run_size: int = 1_000_000,
+    max_runs: int = 16,
+) -> ExternalStateSet:
+    """
+    BFS with delayed duplicate detection for state spaces larger than RAM.
+
+    During a level, successors are only filtered against a bounded in-memory
+    cache of recently visited markings and collected in a buffer that is
+    spilled to disk as a sorted run whenever it holds run_size markings.
+    At the end of the level the candidate runs are merged and subtracted
+    from the visited runs in one sequential pass; what remains is the next
+    frontier and is appended to the visited set as a new run.
+
+    Args:
+        pn (PetriNet): A 1-safe Petri net with unit arcs.
+        workdir (str): Directory for the run files (default: a temp dir,
+                       removed by ExternalStateSet.close()).
+        cache_size (int): Max markings kept in the in-memory recent cache.
+        run_size (int): Max candidate markings buffered before spilling.
+        max_runs (int): Visited runs are compacted into one above this.
+
+    Returns:
+        ExternalStateSet: The reachable markings, streamable from disk.
+                          level_sizes holds the new markings per level.
+    """
+    pre, post, block = compile_masks(pn)
+    masks = list(zip(pre, post, block))
+
+    store = ExternalStateSet(len(pn.place_ids), workdir)
+    nbytes = store.nbytes
+
+    m0 = pack_marking(pn.M0)
+    frontier = store.new_path("visited")
+    store.add_run(frontier, _write_run(frontier, [m0], nbytes))
+    store.level_sizes.append(1)
+    recent: Set[int] = {m0}
+
+    while True:
+        # 1. Expand the frontier into sorted candidate runs
+        candidate_runs: List[str] = []
+        buffer: Set[int] = set()
+
+        for current_m in _iter_run(frontier, nbytes):
+            for pre_t, post_t, block_t in masks:
+                if current_m & pre_t != pre_t or current_m & block_t:
+                    continue
+                next_m = (current_m & ~pre_t) | post_t
+                if next_m in recent or next_m in buffer:
+                    continue
+                buffer.add(next_m)
+                if len(buffer) >= run_size:
+                    path = store.new_path("candidate")
+                    _write_run(path, sorted(buffer), nbytes)
+                    candidate_runs.append(path)
+                    buffer = set()
+
+        if buffer:
+            path = store.new_path("candidate")
+            _write_run(path, sorted(buffer), nbytes)
+            candidate_runs.append(path)
+            buffer = set()
+
+        if not candidate_runs:
+            break
+
+        # 2. Delayed duplicate detection: candidates minus visited, in one
+        #    merge pass over sorted streams
+        if len(store.runs) > max_runs:
+            store.compact()
+
+        candidates = _merge_unique([_iter_run(r, nbytes) for r in candidate_runs])
+        visited = _merge_unique([_iter_run(r, nbytes) for r in store.runs])
+        fresh = _subtract_sorted(candidates, visited)
+
+        new_run = store.new_path("visited")
+        new_count = _write_run(new_run, fresh, nbytes)
+
+        for r in candidate_runs:
+            os.remove(r)
+
+        if new_count == 0:
+            os.remove(new_run)
+            break
+
+        store.add_run(new_run, new_count)
+        store.level_sizes.append(new_count)
+
+        # 3. Keep the recent cache bounded; the fresh run seeds it again
+        if len(recent) + new_count > cache_size:
+            recent.clear()
+        if new_count <= cache_size:
+            recent.update(_iter_run(new_run, nbytes))
+
+        frontier = new_run
+
+    return store
+
+
+def _subtract_sorted(a: Iterator[int], b: Iterator[int]) -> Iterator[int]:
+    """
+    Yields the elements of sorted stream a that are not in sorted stream b.
+    """
+    sentinel = object()
+    y = next(b, sentinel)
+    for x in a:
+        while y is not sentinel and y < x:
+            y = next(b, sentinel)
+        if y is sentinel or y != x:
+            yield x
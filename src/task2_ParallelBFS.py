@@ -0,0 +1,177 @@
+import os
+import multiprocessing as mp
+from typing import Dict, List, Optional, Set, Tuple
+from .task1_PetriNet import PetriNet
+from .task2_BFS import compile_masks, pack_marking, unpack_markings
+
+# ---------------------------
+# Hash partitioning
+# ---------------------------
+# Every packed marking has exactly one owner worker. The owner is the only
+# process that stores the marking in its visited set, so the partitions
+# never overlap and no locking is needed.
+
+_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+def owner_of(code: int, workers: int) -> int:
+    """
+    Worker index owning a packed marking (multiplicative hash of the bits).
+    Nets wider than 64 places are XOR-folded into 64 bits first, so every
+    place takes part in the hash.
+    """
+    folded = code & _MASK64
+    code >>= 64
+    while code:
+        folded ^= code & _MASK64
+        code >>= 64
+    return (((folded * _MIX) & _MASK64) >> 32) % workers
+
+
+def _worker_loop(conn, index: int, workers: int, masks) -> None:
+    """
+    Worker process: owns one hash partition of the visited set.
+
+    Messages received on conn:
+        ("expand", codes) -> keeps the codes not yet visited, fires every
+                             enabled transition from them and replies
+                             (new_count, successors grouped by owner).
+        ("collect", None) -> replies with the whole visited partition.
+        ("stop", None)    -> exits.
+    """
+    visited: Set[int] = set()
+
+    while True:
+        cmd, payload = conn.recv()
+
+        if cmd == "expand":
+            outgoing: List[List[int]] = [[] for _ in range(workers)]
+            new_count = 0
+
+            for current_m in payload:
+                if current_m in visited:
+                    continue
+                visited.add(current_m)
+                new_count += 1
+
+                for pre_t, post_t, block_t in masks:
+                    if current_m & pre_t != pre_t or current_m & block_t:
+                        continue
+                    next_m = (current_m & ~pre_t) | post_t
+                    # Cheap local filter: drop successors this worker owns
+                    # and has already seen
+                    owner = owner_of(next_m, workers)
+                    if owner == index and next_m in visited:
+                        continue
+                    outgoing[owner].append(next_m)
+
+            conn.send((new_count, outgoing))
+
+        elif cmd == "collect":
+            conn.send(list(visited))
+
+        else:
+            conn.close()
+            return
+
+
+def bfs_reachable_parallel_packed(
+    pn: PetriNet,
+    workers: Optional[int] = None,
+) -> Set[int]:
+    """
+    Level-synchronous parallel BFS over packed markings.
+
+    The coordinator (this process) only routes batches: at each level every
+    worker receives the candidate markings it owns, deduplicates them against
+    its partition, expands the new ones and returns their successors grouped
+    by owner. Exploration ends when a level produces no new marking.
+
+    Args:
+        pn (PetriNet): A 1-safe Petri net with unit arcs.
+        workers (int): Number of worker processes (default: CPU count).
+
+    Returns:
+        Set[int]: The reachable markings, packed (see task2_BFS.unpack_markings).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+
+    pre, post, block = compile_masks(pn)
+    masks = list(zip(pre, post, block))
+
+    procs = []
+    conns = []
+    for k in range(workers):
+        parent_conn, child_conn = mp.Pipe()
+        proc = mp.Process(
+            target=_worker_loop,
+            args=(child_conn, k, workers, masks),
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        procs.append(proc)
+        conns.append(parent_conn)
+
+    try:
+        # Level 0: M0 goes to its owner
+        m0 = pack_marking(pn.M0)
+        inbox: Dict[int, List[int]] = {k: [] for k in range(workers)}
+        inbox[owner_of(m0, workers)].append(m0)
+
+        while any(inbox.values()):
+            # Send every batch first so all workers run concurrently
+            for k in range(workers):
+                conns[k].send(("expand", inbox[k]))
+
+            next_inbox: Dict[int, List[int]] = {k: [] for k in range(workers)}
+            total_new = 0
+            for k in range(workers):
+                new_count, outgoing = conns[k].recv()
+                total_new += new_count
+                for owner, batch in enumerate(outgoing):
+                    next_inbox[owner].extend(batch)
+
+            if total_new == 0:
+                break
+            inbox = next_inbox
+
+        visited: Set[int] = set()
+        for k in range(workers):
+            conns[k].send(("collect", None))
+        for k in range(workers):
+            visited.update(conns[k].recv())
+
+    finally:
+        for conn in conns:
+            try:
+                conn.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc in procs:
+            proc.join()
+
+    return visited
+
+
+def bfs_reachable_parallel(
+    pn: PetriNet,
+    workers: Optional[int] = None,
+) -> Set[Tuple[int, ...]]:
+    """
+    Parallel counterpart of bfs_reachable, with the same return contract.
+
+    Args:
+        pn (PetriNet): A 1-safe Petri net with unit arcs.
+        workers (int): Number of worker processes (default: CPU count).
+
+    Returns:
+        Set[Tuple[int, ...]]: A set of unique reachable markings.
+    """
+    num_places = len(pn.place_ids)
+    return set(unpack_markings(bfs_reachable_parallel_packed(pn, workers), num_places))
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import collections
 
 # --- Python 3.10+ compatibility fix for PyEDA ---
@@ -7,74 +9,656 @@ except AttributeError:
     pass
 # -------------------------------------------------
 
-from pyeda.inter import *
+import hashlib
 import numpy as np
-from typing import Tuple
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 from .task1_PetriNet import PetriNet
-from graphviz import Source
+from .task3_Ordering import variable_order
+from .task3_NativeBDD import BDDManager, NativeBDD, FALSE, TRUE
+from .lazy import lazy_import
+
+# Only needed to draw BDDs, loaded on first use
+graphviz = lazy_import("graphviz")
+# Only needed by the PyEDA backend (the native one and BFS never load it);
+# the compatibility fix above runs before it is first used
+pyeda_bdd = lazy_import("pyeda.boolalg.bdd")
 
-# Constant BDDs
-ONE = expr2bdd(expr("1"))
-ZERO = expr2bdd(expr("0"))
+if TYPE_CHECKING:
+    from pyeda.boolalg.bdd import BDDVariable, BinaryDecisionDiagram
 
-def bdd_reachable(pn: PetriNet) -> Tuple[BinaryDecisionDiagram, int]:
+def bdd_reachable(
+    pn: PetriNet,
+    method: str = "partitioned",
+    frontier: bool = True,
+    stats: Optional[Dict[str, Any]] = None,
+    order: Union[str, Sequence[int]] = "natural",
+    interleave: bool = True,
+    reorder_threshold: Optional[int] = None,
+    backend: str = "pyeda",
+    return_vars: bool = False,
+) -> Union[
+    Tuple[BinaryDecisionDiagram, int],
+    Tuple[BinaryDecisionDiagram, int, List[BDDVariable]],
+]:
     """
     Compute the reachable markings of a 1-safe Petri net using BDD-based symbolic exploration.
     Automatically normalizes unsafe variable names (UUIDs) into safe PyEDA-compatible names.
+
+    Args:
+        pn: The Petri net.
+        method: "partitioned" computes the image one transition at a time over
+                the variables that transition touches; "monolithic" builds a
+                single relation R over X and X' (original engine);
+                "saturation" saturates BDD nodes bottom-up (see
+                _saturation_reachable).
+        frontier: If True, each iteration takes the image of the newly found
+                  states only, instead of the whole reachable set S
+                  (breadth-first methods only).
+        stats: Optional dict filled with "iterations", "nodes" (node count of
+               S after each iteration), "image_times" (seconds per image
+               step, breadth-first methods), "peak_nodes" (largest BDD seen,
+               including intermediate images), "order" and "reorders".
+        order: Variable ordering heuristic run before the variables are
+               created ("natural", "dfs", "force", see task3_Ordering) or an
+               explicit permutation of place indices.
+        interleave: Create each X' right after its X (strict current/next
+                    interleaving); otherwise all X come before all X'.
+        reorder_threshold: If set, S is re-ordered by sifting whenever its
+                           node count exceeds this value (breadth-first
+                           methods only); the threshold then doubles.
+        backend: "pyeda", or "native" for the in-project BDD core
+                 (task3_NativeBDD; partitioned and monolithic methods, no
+                 reordering; saturation is rejected up front). The native
+                 result is a NativeBDD, which supports the PyEDA calls used
+                 by tasks 4 and 5.
+        return_vars: Also return the place-index -> BDD variable list, as a
+                     third element: (S, count, X). X[i] is the variable of
+                     place i, whatever its name or position in the order.
+
+    Returns:
+        Tuple: (S, count) or, with return_vars, (S, count, X)
+            - S: BDD of the reachable markings (NativeBDD for the native backend).
+            - count: Number of reachable markings.
+            - X: Place-index -> variable list of S. Needed to read S back
+                 when it was built under a non-default order or reordered,
+                 since those variables carry generated names.
     """
+    if not pn.is_unit():
+        raise ValueError("BDD engine requires a 1-safe net with unit arcs")
+    if backend == "native" and method == "saturation":
+        raise ValueError("Saturation needs the PyEDA backend")
 
     num_places = len(pn.place_ids)
+    order_list = variable_order(pn, order)
+
+    if backend == "native":
+        if reorder_threshold is not None:
+            raise ValueError("Dynamic reordering needs the PyEDA backend")
+        S, count = _native_reachable(pn, method, frontier, stats, order_list, interleave)
+        return (S, count, bdd_place_vars(pn, S)) if return_vars else (S, count)
+    if backend != "pyeda":
+        raise ValueError(f"Unknown BDD backend: {backend}")
+
+    X, X_prime = place_variables(pn, order_list, interleave)
+
+    # ---------------------------
+    # 1. Encode initial marking M0
+    # ---------------------------
+    S = pyeda_bdd.BDDONE
+    for i in range(num_places):
+        S &= X[i] if pn.M0[i] == 1 else ~X[i]
+
+    # ---------------------------
+    # 2. Build the image operator
+    # ---------------------------
+    if method == "saturation":
+        S = _saturation_reachable(S, transition_partitions(pn, X), X, stats)
+        if stats is not None:
+            stats["order"] = order_list
+            stats["reorders"] = 0
+        count = count_markings(S, X)
+        return (S, count, X) if return_vars else (S, count)
+    elif method == "partitioned":
+        def build_image(X, X_prime):
+            parts = transition_partitions(pn, X)
+            return lambda states: _image_partitioned(states, parts)
+    elif method == "monolithic":
+        build_image = lambda X, X_prime: _monolithic_image(pn, X, X_prime)
+    else:
+        raise ValueError(f"Unknown BDD method: {method}")
+    image = build_image(X, X_prime)
 
     # ---------------------------
-    # 1. Create BDD variables
+    # 3. Fixpoint: symbolic reachability
     # ---------------------------
-    # If a place_id has a valid variable name (alphabetic start, alphanumeric/underscore),
-    # use it directly (for test cases). Otherwise fallback to p0, p1, ...
-    X = []
-    X_prime = []
+    # Node counts walk the whole BDD, so they are only taken on request
+    track = stats is not None
+    node_history = [bdd_node_count(S)] if track else []
+    peak = node_history[0] if track else 0
+    image_times: List[float] = []
+    reorders = 0
+    new_states = S
+    while True:
+        start_t = time.perf_counter()
+        img = image(new_states if frontier else S)
+        image_times.append(time.perf_counter() - start_t)
+        if track:
+            peak = max(peak, bdd_node_count(img))
+
+        new_states = img & ~S              # newly discovered markings
+        if new_states.is_zero():
+            break                           # fixed point reached
+
+        S |= new_states
+        if track:
+            node_history.append(bdd_node_count(S))
+            peak = max(peak, node_history[-1])
+
+        # Dynamic reordering: move S (and the frontier) to a sifted order
+        if reorder_threshold is not None and bdd_node_count(S) > reorder_threshold:
+            order_list = sift_order(pn, S, X, order_list, interleave)
+            X_new, X_prime = place_variables(pn, order_list, interleave)
+            S = rename_places(S, X, X_new)
+            new_states = rename_places(new_states, X, X_new)
+            X = X_new
+            image = build_image(X, X_prime)
+            reorder_threshold = 2 * bdd_node_count(S)
+            reorders += 1
+
+    if track:
+        stats["iterations"] = len(node_history)
+        stats["nodes"] = node_history
+        stats["image_times"] = image_times
+        stats["peak_nodes"] = peak
+        stats["order"] = order_list
+        stats["reorders"] = reorders
+
+    # Return reachable set BDD and number of satisfying assignments
+    count = count_markings(S, X)
+    return (S, count, X) if return_vars else (S, count)
+
 
+def count_markings(bdd: BinaryDecisionDiagram, X: List[BDDVariable]) -> int:
+    """
+    Exact number of markings over the places X satisfied by a BDD.
+
+    Walks the node graph once with memoization. When an edge skips k levels
+    of X (the skipped places are don't-cares), the count below it is
+    multiplied by 2^k, which is what satisfy_count() got wrong for places
+    outside the BDD support. Linear in the BDD size. Works for both
+    backends (X are NativeVars for a NativeBDD).
+    """
+    if isinstance(bdd, NativeBDD):
+        return bdd.manager.count(bdd.node, [v.level for v in X])
+
+    order = sorted(X, key=lambda v: v.uniqid)
+    level = {v.uniqid: j for j, v in enumerate(order)}
+    n = len(order)
+
+    extra = set(v.uniqid for v in bdd.support) - set(level)
+    if extra:
+        raise ValueError("BDD depends on variables outside X")
+
+    def level_of(node) -> int:
+        return n if node.root < 0 else level[node.root]
+
+    memo: Dict[Any, int] = {}
+    node_zero, node_one = pyeda_bdd.BDDNODEZERO, pyeda_bdd.BDDNODEONE
+
+    def walk(node) -> int:
+        # Number of assignments to the variables at level_of(node) and below
+        if node is node_zero:
+            return 0
+        if node is node_one:
+            return 1
+        if node in memo:
+            return memo[node]
+        k = level_of(node)
+        total = 0
+        for child in (node.lo, node.hi):
+            total += walk(child) << (level_of(child) - k - 1)
+        memo[node] = total
+        return total
+
+    return walk(bdd.node) << level_of(bdd.node)
+
+
+def place_names(pn: PetriNet) -> List[str]:
+    """
+    BDD variable name of each place.
+
+    If a place_id has a valid variable name (alphabetic start, alphanumeric/underscore),
+    use it directly (for test cases). Otherwise fallback to P1, P2, ...
+    """
+    names = []
     for i, pid in enumerate(pn.place_ids):
         if pid and pid[0].isalpha() and all(c.isalnum() or c == "_" for c in pid):
             name = pid          # keep original name (e.g., p1, P2, ...)
         else:
             name = f"P{i+1}"      # invalid name (UUID) → replace by safe p{i}
+        names.append(name)
+    return names
+
+
+def place_variables(
+    pn: PetriNet,
+    order: Optional[Sequence[int]] = None,
+    interleave: bool = True,
+) -> Tuple[List[BDDVariable], List[BDDVariable]]:
+    """
+    Current-state (X) and next-state (X') variables, one pair per place.
+    Both lists are indexed by place; order only decides creation order,
+    which is the BDD variable order in PyEDA. Names come from place_names.
+
+    PyEDA variables are global and keep the order of their first creation,
+    so any non-default order gets its own name suffix (letters only, derived
+    from the permutation) and therefore fresh variables.
+    """
+    num_places = len(pn.place_ids)
+    if order is None:
+        order = list(range(num_places))
+    names = place_names(pn)
+
+    suffix = ""
+    if list(order) != list(range(num_places)) or not interleave:
+        key = f"{list(order)}{interleave}".encode()
+        digest = hashlib.md5(key).hexdigest()[:8]
+        suffix = "_" + digest.translate(str.maketrans("0123456789", "ghijklmnop"))
 
-        X.append(bddvar(name))              # current-state variable
-        X_prime.append(bddvar(name + "_prime"))  # next-state variable
+    names = [name + suffix for name in names]
+
+    X: List[Optional[BDDVariable]] = [None] * num_places
+    X_prime: List[Optional[BDDVariable]] = [None] * num_places
+    for i in order:
+        X[i] = pyeda_bdd.bddvar(names[i])                      # current-state variable
+        if interleave:
+            X_prime[i] = pyeda_bdd.bddvar(names[i] + "_prime")   # next-state variable
+    if not interleave:
+        for i in order:
+            X_prime[i] = pyeda_bdd.bddvar(names[i] + "_prime")
+    return X, X_prime
+
+
+def bdd_place_vars(pn: PetriNet, bdd: BinaryDecisionDiagram) -> List[BDDVariable]:
+    """
+    Current-state variable of each place for a BDD returned by bdd_reachable.
+
+    Native BDDs carry their variables; for PyEDA the variables are found by
+    place name, which only covers the default variable set. A BDD built
+    under another order (or after sifting) has other variables: use the
+    list from bdd_reachable(..., return_vars=True) instead.
+    """
+    names = place_names(pn)
+    if isinstance(bdd, NativeBDD):
+        by_name = {v.name: v for v in bdd.manager.vars}
+        return [by_name[name] for name in names]
+
+    _check_support(bdd, names)
+    return [pyeda_bdd.bddvar(name) for name in names]
+
+
+def bdd_vars_by_name(names: Sequence[str], bdd: BinaryDecisionDiagram) -> List[Optional[BDDVariable]]:
+    """
+    Like bdd_place_vars for a plain list of variable names, without creating
+    variables: a PyEDA name outside the BDD support maps to None (the place
+    is a don't-care everywhere in the BDD).
+    """
+    if isinstance(bdd, NativeBDD):
+        by_name = {v.name: v for v in bdd.manager.vars}
+        return [by_name.get(name) for name in names]
+
+    _check_support(bdd, names)
+    by_name = {v.names[0]: v for v in bdd.support}
+    return [by_name.get(name) for name in names]
+
+
+def _check_support(bdd: BinaryDecisionDiagram, names: Sequence[str]) -> None:
+    extra = {v.names[0] for v in bdd.support} - set(names)
+    if extra:
+        raise ValueError(
+            "BDD depends on variables other than the place names "
+            "(reordered?); pass the variables from bdd_reachable(..., return_vars=True)"
+        )
+
+
+# ---------------------------
+# Flattened BDDs
+# ---------------------------
+# A BDD of either backend copied into NumPy arrays indexed by node: index 0
+# is FALSE, 1 is TRUE and the internal nodes follow in post-order, so every
+# child has a smaller index than its parent. Node variables are stored as
+# place indices, which removes any dependence on variable names.
+
+class FlatBDD(NamedTuple):
+    place: np.ndarray   # place index of the node variable (-1 for terminals)
+    rank: np.ndarray    # position of that place in the variable order (n for terminals)
+    lo: np.ndarray      # index of the 0-child
+    hi: np.ndarray      # index of the 1-child
+    root: int
+    order: List[int]    # places from the top level to the bottom level
+                        # (places without a variable are not listed)
+
+
+def flatten_bdd(bdd: BinaryDecisionDiagram, X: List[BDDVariable]) -> FlatBDD:
+    """
+    Copies a BDD over the place variables X into a FlatBDD.
+
+    X may hold None for places without a variable (not in the support);
+    those places are left out of the order.
+    """
+    ranked = [i for i in range(len(X)) if X[i] is not None]
+    n = len(ranked)
+    if isinstance(bdd, NativeBDD):
+        mgr = bdd.manager
+        place_of = {X[i].level: i for i in ranked}
+        root = bdd.node
+        is_terminal = lambda u: u < 2
+        is_one = lambda u: u == TRUE
+        key_of = mgr.level
+        children = lambda u: (mgr.low(u), mgr.high(u))
+    else:
+        place_of = {X[i].uniqid: i for i in ranked}
+        root = bdd.node
+        is_terminal = lambda u: u.root < 0
+        node_one = pyeda_bdd.BDDNODEONE
+        is_one = lambda u: u is node_one
+        key_of = lambda u: u.root
+        children = lambda u: (u.lo, u.hi)
+
+    order = sorted(ranked, key=lambda i: X[i].uniqid)
+    rank_of = {p: k for k, p in enumerate(order)}
+
+    index: Dict[Any, int] = {}
+    place, rank, lo, hi = [-1, -1], [n, n], [0, 1], [0, 1]
+
+    # Iterative post-order: a node is numbered after both children
+    stack = [(root, False)]
+    while stack:
+        u, expanded = stack.pop()
+        if u in index:
+            continue
+        if is_terminal(u):
+            index[u] = 1 if is_one(u) else 0
+            continue
+        c0, c1 = children(u)
+        if not expanded:
+            stack.append((u, True))
+            stack.append((c1, False))
+            stack.append((c0, False))
+            continue
+        p = place_of[key_of(u)]
+        index[u] = len(place)
+        place.append(p)
+        rank.append(rank_of[p])
+        lo.append(index[c0])
+        hi.append(index[c1])
+
+    return FlatBDD(
+        np.array(place), np.array(rank), np.array(lo), np.array(hi), index[root], order
+    )
+
+
+def bdd_contains(flat: FlatBDD, marking: Sequence[int]) -> bool:
+    """
+    Membership of one marking: a single root-to-leaf walk.
+    """
+    u = flat.root
+    place, lo, hi = flat.place, flat.lo, flat.hi
+    while u > 1:
+        u = hi[u] if marking[place[u]] else lo[u]
+    return u == 1
+
+
+def bdd_contains_many(flat: FlatBDD, markings: np.ndarray) -> np.ndarray:
+    """
+    Membership of many markings at once ((N x places) array -> N bools).
+    All walks advance one level per step as NumPy array operations.
+    """
+    markings = np.asarray(markings)
+    cur = np.full(len(markings), flat.root)
+    rows = np.arange(len(markings))
+    active = cur > 1
+    while active.any():
+        u = cur[active]
+        bits = markings[rows[active], flat.place[u]]
+        cur[active] = np.where(bits != 0, flat.hi[u], flat.lo[u])
+        active = cur > 1
+    return cur == 1
+
+
+def iter_markings(
+    bdd: BinaryDecisionDiagram,
+    X: List[BDDVariable],
+) -> Iterator[Tuple[int, ...]]:
+    """
+    Lazily yields every marking of the set, don't-cares expanded.
+
+    Markings come out in lexicographic order of the places taken in BDD
+    variable order (place-index order for the default "natural" ordering),
+    0 before 1. The walk is an explicit-stack DFS over the flattened BDD:
+    a skipped level branches on both values without moving, and since a
+    reduced BDD has no dead non-FALSE node, every step leads to output.
+    Memory is one marking plus a stack of depth <= places.
+
+    Args:
+        bdd: A set of markings over X (e.g. from bdd_reachable).
+        X: Place-index -> BDD variable list; places with None (outside the
+           support) are free and enumerated last.
+    """
+    flat = flatten_bdd(bdd, X)
+    num_places = len(X)
+    in_order = set(flat.order)
+    order = list(flat.order) + [p for p in range(num_places) if p not in in_order]
+    n = len(order)
+    rank, lo, hi = (a.tolist() for a in (flat.rank, flat.lo, flat.hi))
+
+    if flat.root == 0:
+        return
+    marking = [0] * num_places
+    # (depth, node, bit): set place order[depth - 1] to bit, continue at node
+    stack = [(0, flat.root, 0)]
+    while stack:
+        k, u, bit = stack.pop()
+        if k > 0:
+            marking[order[k - 1]] = bit
+        if k == n:
+            yield tuple(marking)
+            continue
+        if u > 1 and rank[u] == k:
+            c0, c1 = lo[u], hi[u]
+        else:
+            c0 = c1 = u         # level skipped: place is a don't-care
+        # Pushed 1 first so the 0 branch is explored first
+        if c1 != 0:
+            stack.append((k + 1, c1, 1))
+        if c0 != 0:
+            stack.append((k + 1, c0, 0))
+
+
+def rename_places(
+    bdd: BinaryDecisionDiagram,
+    X_old: List[BDDVariable],
+    X_new: List[BDDVariable],
+) -> BinaryDecisionDiagram:
+    """
+    Moves a BDD over X_old onto X_new (same places, another variable order).
+    """
+    return bdd.compose({X_old[i]: X_new[i] for i in range(len(X_old))})
+
+
+def sift_order(
+    pn: PetriNet,
+    S: BinaryDecisionDiagram,
+    X: List[BDDVariable],
+    order: List[int],
+    interleave: bool = True,
+    max_vars: Optional[int] = 16,
+) -> List[int]:
+    """
+    Sifting-style reordering of S.
+
+    Each place (largest support first, at most max_vars of them) is moved
+    through every position while the others keep their relative order;
+    it stays where S has the fewest nodes. PyEDA cannot swap levels in
+    place, so candidates are measured on a copy of S in a scratch native
+    manager (see _size_in_order) instead of on new PyEDA variables, which
+    are global and never freed.
+    """
+    best = list(order)
+    best_size = bdd_node_count(S)
+
+    flat = flatten_bdd(S, X)
+    # Places that label the most nodes are sifted first
+    occupancy = collections.Counter(flat.place[2:].tolist())
+    places = sorted(range(len(X)), key=lambda i: -occupancy.get(i, 0))
+    if max_vars is not None:
+        places = places[:max_vars]
+
+    mgr = BDDManager([str(p) for p in range(len(X))])
+    for p in places:
+        rest = [q for q in best if q != p]
+        for pos in range(len(best)):
+            cand = rest[:pos] + [p] + rest[pos:]
+            if cand == best:
+                continue
+            size = _size_in_order(mgr, flat, cand)
+            if size < best_size:
+                best, best_size = cand, size
+
+    return best
+
+
+def _size_in_order(mgr: BDDManager, flat: FlatBDD, order: List[int]) -> int:
+    """
+    Node count of the flattened BDD rebuilt in mgr with order[k] at level k.
+    """
+    level = {p: k for k, p in enumerate(order)}
+    node = [FALSE, TRUE]
+    place, lo, hi = (a.tolist() for a in (flat.place, flat.lo, flat.hi))
+    # Children precede parents in a FlatBDD
+    for u in range(2, len(place)):
+        node.append(mgr.ITE(mgr.var(level[place[u]]), node[hi[u]], node[lo[u]]))
+    return len(mgr.nodes(node[flat.root]))
+
+
+def ordering_report(
+    pn: PetriNet,
+    heuristics: Tuple[str, ...] = ("natural", "dfs", "force"),
+    method: str = "partitioned",
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs bdd_reachable under each ordering heuristic and reports the final
+    and peak node counts, wall time and the order used.
+    """
+    report = {}
+    for heuristic in heuristics:
+        stats: Dict[str, Any] = {}
+        start_t = time.perf_counter()
+        _, count = bdd_reachable(pn, method=method, stats=stats, order=heuristic)
+        report[heuristic] = {
+            "final_nodes": stats["nodes"][-1],
+            "peak_nodes": stats["peak_nodes"],
+            "time": time.perf_counter() - start_t,
+            "count": count,
+            "order": stats["order"],
+        }
+    return report
+
+
+def bdd_node_count(bdd: BinaryDecisionDiagram) -> int:
+    """
+    Number of nodes (including terminals) reachable from the BDD root.
+    """
+    if isinstance(bdd, NativeBDD):
+        return bdd.node_count()
+    return sum(1 for _ in bdd.dfs_preorder())
+
+
+# ---------------------------
+# Partitioned transition relation
+# ---------------------------
+# For a 1-safe net the next value of every place a transition touches is a
+# constant (consumed -> 0, produced -> 1), and places it does not touch keep
+# their value. The image of S under t is therefore
+#     (S & enabled_t).smoothing(touched_t) & effect_t
+# with no next-state variables and no frame condition over other places.
+
+def transition_partitions(
+    pn: PetriNet,
+    X: List[BDDVariable],
+) -> List[Tuple[BinaryDecisionDiagram, List[BDDVariable], BinaryDecisionDiagram]]:
+    """
+    Per-transition (enabled, touched variables, effect) triples.
+    """
+    if not pn.is_unit():
+        raise ValueError("Partitioned relation requires a 1-safe net with unit arcs")
+    parts = []
+
+    for t in range(pn.num_transitions):
+        inputs = set(pn.pre.places(t))
+        outputs = set(pn.post.places(t))
+
+        enabled = pyeda_bdd.BDDONE
+        effect = pyeda_bdd.BDDONE
+        touched = []
+        # Only the places t is connected to (sparse row)
+        for i in sorted(inputs | outputs):
+            is_in = i in inputs
+            is_out = i in outputs
+            touched.append(X[i])
+
+            if is_in:
+                enabled &= X[i]           # input place must contain a token
+            else:
+                enabled &= ~X[i]          # enforce 1-safety (place must be empty)
+
+            effect &= X[i] if is_out else ~X[i]
+
+        parts.append((enabled, touched, effect))
+
+    return parts
+
+
+def _image_partitioned(S: BinaryDecisionDiagram, parts) -> BinaryDecisionDiagram:
+    img = pyeda_bdd.BDDZERO
+    for enabled, touched, effect in parts:
+        step = S & enabled
+        if step.is_zero():
+            continue
+        img |= step.smoothing(touched) & effect
+    return img
+
+
+def _monolithic_image(pn: PetriNet, X: List[BDDVariable], X_prime: List[BDDVariable]):
+    """
+    Image operator over a single transition relation R(X, X').
+    """
+    num_places = len(X)
 
     # rename X' → X after transition firing
     rename_map = {X_prime[i]: X[i] for i in range(num_places)}
 
-    # ---------------------------
-    # 2. Encode initial marking M0
-    # ---------------------------
-    S = ONE
-    for i in range(num_places):
-        S &= X[i] if pn.M0[i] == 1 else ~X[i]
-
-    # ---------------------------
-    # 3. Build transition relation R
-    # ---------------------------
-    R = ZERO
-    num_trans = len(pn.I)
+    R = pyeda_bdd.BDDZERO
+    num_trans = pn.num_transitions
 
     for t in range(num_trans):
-        input_vec = pn.I[t]
-        output_vec = pn.O[t]
+        inputs = set(pn.pre.places(t))
+        outputs = set(pn.post.places(t))
 
         # Enabling condition (transition can fire)
-        enabling = ONE
-        for i in range(num_places):
-            if input_vec[i] == 1:
+        enabling = pyeda_bdd.BDDONE
+        for i in sorted(inputs | outputs):
+            if i in inputs:
                 enabling &= X[i]          # input place must contain a token
-            if output_vec[i] == 1 and input_vec[i] == 0:
+            else:
                 enabling &= ~X[i]         # enforce 1-safety (place must be empty)
 
         # Post-transition marking (X → X')
-        change = ONE
+        change = pyeda_bdd.BDDONE
         for i in range(num_places):
-            is_in = input_vec[i] == 1
-            is_out = output_vec[i] == 1
+            is_in = i in inputs
+            is_out = i in outputs
 
             if is_in and not is_out:
                 change &= ~X_prime[i]         # token consumed
@@ -85,36 +669,255 @@ def bdd_reachable(pn: PetriNet) -> Tuple[BinaryDecisionDiagram, int]:
 
         R |= (enabling & change)
 
-    # ---------------------------
-    # 4. Fixpoint: symbolic reachability
-    # ---------------------------
-    while True:
+    def image(S: BinaryDecisionDiagram) -> BinaryDecisionDiagram:
         # Compute S × R (image)
         step = S & R
         img = step.smoothing(X)            # eliminate current-state vars
-        nxt = img.compose(rename_map)      # rename X' → X
+        return img.compose(rename_map)     # rename X' → X
 
-        new_states = nxt & ~S              # newly discovered markings
-        if new_states.is_zero():
-            break                           # fixed point reached
+    return image
 
-        S |= nxt
 
-    
-    # Replace old satisfy_count() due to bug with don't-cares
-    count = 0
-    for i in range(2 ** num_places):
-        # Generate marking from binary representation
-        marking = tuple((i >> j) & 1 for j in range(num_places))
-        # Check if this marking is in the reachable set
-        constraint = ONE
-        for j in range(num_places):
-            constraint &= X[j] if marking[j] == 1 else ~X[j]
-        if not (S & constraint).is_zero():
-            count += 1
-    
-    # Return reachable set BDD and number of satisfying assignments
-    return S, count
+# ---------------------------
+# Saturation
+# ---------------------------
+# Transitions (events) are grouped by Top(e), the topmost variable they
+# touch in the BDD order. Saturate(f, j) returns the fixpoint of f under
+# every event whose touched variables all lie at level j or below: both
+# cofactors of f on the level-j variable are saturated first (bottom-up),
+# then the events with Top(e) == j are fired until nothing new appears,
+# with newly found states saturated below level j before being merged.
+# Results are memoized per (node, level), so shared sub-BDDs are saturated
+# once.
+
+def _saturation_reachable(
+    S: BinaryDecisionDiagram,
+    parts,
+    X: List[BDDVariable],
+    stats: Optional[Dict[str, Any]] = None,
+) -> BinaryDecisionDiagram:
+    order = sorted(X, key=lambda v: v.uniqid)
+    level = {v: j for j, v in enumerate(order)}
+    n = len(order)
+
+    events_at: List[list] = [[] for _ in range(n)]
+    for enabled, touched, effect in parts:
+        if touched:
+            events_at[min(level[v] for v in touched)].append((enabled, touched, effect))
+
+    track = stats is not None
+    counters = {"iterations": 0, "peak_nodes": bdd_node_count(S) if track else 0}
+    memo: Dict[Tuple[int, int], Tuple[BinaryDecisionDiagram, BinaryDecisionDiagram]] = {}
+
+    def split(f: BinaryDecisionDiagram, j: int) -> BinaryDecisionDiagram:
+        # Saturate both cofactors below level j and rebuild the node
+        v = order[j]
+        lo = saturate(f.restrict({v: 0}), j + 1)
+        hi = saturate(f.restrict({v: 1}), j + 1)
+        return (v & hi) | (~v & lo)
+
+    def saturate(f: BinaryDecisionDiagram, j: int) -> BinaryDecisionDiagram:
+        if j == n or f.is_zero():
+            return f
+        key = (id(f.node), j)
+        if key in memo:
+            return memo[key][1]
+
+        g = split(f, j)
+        while events_at[j]:
+            counters["iterations"] += 1
+            img = _image_partitioned(g, events_at[j])
+            new_states = img & ~g
+            if new_states.is_zero():
+                break
+            g |= split(new_states, j)
+            if track:
+                counters["peak_nodes"] = max(counters["peak_nodes"], bdd_node_count(g))
+
+        # f is stored with the result to keep its node (and id) alive
+        memo[key] = (f, g)
+        return g
+
+    S = saturate(S, 0)
+    if track:
+        stats["iterations"] = counters["iterations"]
+        stats["nodes"] = [bdd_node_count(S)]
+        stats["peak_nodes"] = max(counters["peak_nodes"], stats["nodes"][0])
+    return S
+
+
+def compare_engines(
+    pn: PetriNet,
+    methods: Tuple[str, ...] = ("monolithic", "partitioned", "saturation"),
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs bdd_reachable with each method and reports iterations, peak node
+    count, wall time and reachable count. Raises if the engines disagree.
+    """
+    report = {}
+    reference = None
+    for method in methods:
+        stats: Dict[str, Any] = {}
+        start_t = time.perf_counter()
+        S, count = bdd_reachable(pn, method=method, stats=stats)
+        elapsed = time.perf_counter() - start_t
+
+        if reference is None:
+            reference = S
+        elif not S.equivalent(reference):
+            raise AssertionError(f"BDD engine '{method}' disagrees with '{methods[0]}'")
+
+        report[method] = {
+            "iterations": stats["iterations"],
+            "peak_nodes": stats["peak_nodes"],
+            "time": elapsed,
+            "count": count,
+        }
+    return report
+
+
+# ---------------------------
+# Native backend
+# ---------------------------
+# Same fixpoint as the PyEDA path, on node ids of one BDDManager. Levels:
+# with interleaving X[i] is at 2k and X'[i] at 2k + 1, where k is the
+# position of place i in the variable order; otherwise X fills 0..n-1 and
+# X' fills n..2n-1.
+
+def _native_reachable(
+    pn: PetriNet,
+    method: str,
+    frontier: bool,
+    stats: Optional[Dict[str, Any]],
+    order_list: List[int],
+    interleave: bool,
+) -> Tuple[NativeBDD, int]:
+    num_places = len(pn.place_ids)
+    names = place_names(pn)
+
+    x_level = [0] * num_places
+    xp_level = [0] * num_places
+    for k, i in enumerate(order_list):
+        x_level[i] = 2 * k if interleave else k
+        xp_level[i] = 2 * k + 1 if interleave else num_places + k
+
+    level_names = [""] * (2 * num_places)
+    for i in range(num_places):
+        level_names[x_level[i]] = names[i]
+        level_names[xp_level[i]] = names[i] + "_prime"
+    mgr = BDDManager(level_names)
+
+    # Initial marking M0
+    S = mgr.cube({x_level[i]: int(pn.M0[i] == 1) for i in range(num_places)})
+
+    if method == "partitioned":
+        parts = []
+        for t in range(pn.num_transitions):
+            inputs = set(pn.pre.places(t))
+            outputs = set(pn.post.places(t))
+            enabled = {}
+            effect = {}
+            for i in sorted(inputs | outputs):
+                is_in = i in inputs
+                is_out = i in outputs
+                # input place marked / output-only place empty (1-safety)
+                enabled[x_level[i]] = 1 if is_in else 0
+                effect[x_level[i]] = 1 if is_out else 0
+            touched = mgr.cube({v: 1 for v in enabled})
+            parts.append((mgr.cube(enabled), touched, mgr.cube(effect)))
+
+        def image(states: int) -> int:
+            img = FALSE
+            for enabled, touched, effect in parts:
+                step = mgr.and_exists(states, enabled, touched)
+                if step != FALSE:
+                    img = mgr.OR(img, mgr.AND(step, effect))
+            return img
+
+    elif method == "monolithic":
+        R = FALSE
+        for t in range(pn.num_transitions):
+            inputs = set(pn.pre.places(t))
+            outputs = set(pn.post.places(t))
+            rel = TRUE
+            for i in range(num_places):
+                x, xp = mgr.var(x_level[i]), mgr.var(xp_level[i])
+                is_in = i in inputs
+                is_out = i in outputs
+                if is_in:
+                    rel = mgr.AND(rel, x)
+                elif is_out:
+                    rel = mgr.AND(rel, mgr.NOT(x))
+                if is_in and not is_out:
+                    rel = mgr.AND(rel, mgr.NOT(xp))       # token consumed
+                elif is_out:
+                    rel = mgr.AND(rel, xp)                # token produced
+                else:
+                    rel = mgr.AND(rel, mgr.ITE(x, xp, mgr.NOT(xp)))  # unchanged
+            R = mgr.OR(R, rel)
+
+        all_x = mgr.cube({v: 1 for v in x_level})
+        rename_map = {xp_level[i]: x_level[i] for i in range(num_places)}
+
+        def image(states: int) -> int:
+            return mgr.rename(mgr.and_exists(states, R, all_x), rename_map)
+
+    else:
+        raise ValueError(f"Native backend does not support method: {method}")
+
+    track = stats is not None
+    node_history = [len(mgr.nodes(S))] if track else []
+    peak = node_history[0] if track else 0
+    image_times: List[float] = []
+    new_states = S
+    while True:
+        start_t = time.perf_counter()
+        img = image(new_states if frontier else S)
+        image_times.append(time.perf_counter() - start_t)
+        if track:
+            peak = max(peak, len(mgr.nodes(img)))
+
+        new_states = mgr.DIFF(img, S)
+        if new_states == FALSE:
+            break
+
+        S = mgr.OR(S, new_states)
+        if track:
+            node_history.append(len(mgr.nodes(S)))
+            peak = max(peak, node_history[-1])
+
+    if track:
+        stats["iterations"] = len(node_history)
+        stats["nodes"] = node_history
+        stats["image_times"] = image_times
+        stats["peak_nodes"] = peak
+        stats["order"] = order_list
+        stats["reorders"] = 0
+        stats["table_nodes"] = len(mgr)
+        stats["cache"] = mgr.cache_stats()
+
+    return NativeBDD(mgr, S), mgr.count(S, x_level)
+
+
+def cross_check_backends(pn: PetriNet, method: str = "partitioned") -> bool:
+    """
+    Runs both backends and checks that they build the same reachable set.
+    """
+    S_pyeda, count_pyeda = bdd_reachable(pn, method=method)
+    S_native, count_native = bdd_reachable(pn, method=method, backend="native")
+
+    X, _ = place_variables(pn)
+    var_map = {v.level: X[i] for i, v in _native_place_vars(pn, S_native)}
+    rebuilt = S_native.to_pyeda(var_map)
+    return count_pyeda == count_native and rebuilt.equivalent(S_pyeda)
+
+
+def _native_place_vars(pn: PetriNet, bdd: NativeBDD):
+    """
+    (place index, NativeVar) pairs of the current-state variables.
+    """
+    by_name = {v.name: v for v in bdd.manager.vars}
+    return [(i, by_name[name]) for i, name in enumerate(place_names(pn))]
 
 
 def visualize_bdd(bdd, filename="bdd_reachable_set"):
@@ -124,7 +927,7 @@ def visualize_bdd(bdd, filename="bdd_reachable_set"):
 
     print(f"Drawing BDD to {filename}.png ...")
     dot_source = bdd.to_dot()
-    src = Source(dot_source)
+    src = graphviz.Source(dot_source)
     src.render(filename, format='png', view=False)
     
     print("Done!")
\ No newline at end of file
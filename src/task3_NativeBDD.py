@@ -0,0 +1,620 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# ---------------------------
+# Native BDD core
+# ---------------------------
+# Reduced ordered BDDs over variables identified by their level (0 = root).
+# Nodes are integer ids into three parallel arrays (var, lo, hi); ids 0 and
+# 1 are the FALSE and TRUE terminals, whose var is the sentinel num_vars.
+# A unique table hash-conses (var, lo, hi) so equal functions share one id,
+# which makes equivalence an id comparison. Operation results are memoized
+# in bounded computed tables.
+
+FALSE = 0
+TRUE = 1
+
+
+class _Cache:
+    """
+    Bounded computed table with generational eviction.
+
+    Entries go to the young generation; when it is full the old generation
+    is dropped and the young one becomes old. Lookups check both, so the
+    cache holds at most 2 * max_size entries and recent results survive a
+    flush.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.young: Dict[Any, int] = {}
+        self.old: Dict[Any, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[int]:
+        r = self.young.get(key)
+        if r is None:
+            r = self.old.get(key)
+        if r is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return r
+
+    def put(self, key, value: int) -> None:
+        if len(self.young) >= self.max_size:
+            self.old = self.young
+            self.young = {}
+        self.young[key] = value
+
+    def clear(self) -> None:
+        self.young = {}
+        self.old = {}
+
+
+class BDDManager:
+    """
+    Node tables, unique table and operation caches for one variable order.
+
+    Args:
+        names: One name per variable, in level order.
+        cache_size: Entries per computed-table generation.
+    """
+
+    def __init__(self, names: Sequence[str], cache_size: int = 1 << 18):
+        self.num_vars = len(names)
+        self.vars = [NativeVar(self, name, level) for level, name in enumerate(names)]
+
+        n = self.num_vars
+        self._var = array("l", [n, n])
+        self._lo = array("l", [FALSE, TRUE])
+        self._hi = array("l", [FALSE, TRUE])
+        self._unique: Dict[Tuple[int, int, int], int] = {}
+
+        self._and = _Cache(cache_size)
+        self._or = _Cache(cache_size)
+        self._not = _Cache(cache_size)
+        self._ite = _Cache(cache_size)
+        self._exists = _Cache(cache_size)
+        self._and_exists = _Cache(cache_size)
+
+    # --- Node construction ---
+
+    def mk(self, v: int, lo: int, hi: int) -> int:
+        if lo == hi:
+            return lo
+        key = (v, lo, hi)
+        u = self._unique.get(key)
+        if u is None:
+            u = len(self._var)
+            self._var.append(v)
+            self._lo.append(lo)
+            self._hi.append(hi)
+            self._unique[key] = u
+        return u
+
+    def var(self, v: int) -> int:
+        return self.mk(v, FALSE, TRUE)
+
+    def nvar(self, v: int) -> int:
+        return self.mk(v, TRUE, FALSE)
+
+    def cube(self, literals: Dict[int, int]) -> int:
+        """
+        Conjunction of literals {level: 0/1}, built bottom-up.
+        """
+        u = TRUE
+        for v in sorted(literals, reverse=True):
+            u = self.mk(v, FALSE, u) if literals[v] else self.mk(v, u, FALSE)
+        return u
+
+    def level(self, u: int) -> int:
+        return self._var[u]
+
+    def low(self, u: int) -> int:
+        return self._lo[u]
+
+    def high(self, u: int) -> int:
+        return self._hi[u]
+
+    def __len__(self) -> int:
+        return len(self._var)
+
+    # --- Boolean operations ---
+    # Operations descend once per level, so they run on explicit stacks
+    # rather than Python recursion, which would need a recursion limit (and
+    # C stack) proportional to the number of places. A frame (args, -1)
+    # evaluates args; (args, top) combines the two cofactor results on the
+    # value stack into a node at level top and memoizes it under args.
+
+    def NOT(self, u: int) -> int:
+        if u < 2:
+            return 1 - u
+        var, lo, hi = self._var, self._lo, self._hi
+        cache, mk = self._not, self.mk
+        values: List[int] = []
+        stack = [(u, -1)]
+        while stack:
+            n, top = stack.pop()
+            if top >= 0:
+                r1 = values.pop()
+                r = mk(top, values.pop(), r1)
+                cache.put(n, r)
+                values.append(r)
+                continue
+            r = 1 - n if n < 2 else cache.get(n)
+            if r is not None:
+                values.append(r)
+                continue
+            stack.append((n, var[n]))
+            stack.append((hi[n], -1))
+            stack.append((lo[n], -1))
+        return values[0]
+
+    def AND(self, u: int, v: int) -> int:
+        return self._apply(self._and, FALSE, u, v)
+
+    def OR(self, u: int, v: int) -> int:
+        return self._apply(self._or, TRUE, u, v)
+
+    def _apply(self, cache: _Cache, absorbing: int, u: int, v: int) -> int:
+        """
+        AND (absorbing = FALSE) or OR (absorbing = TRUE) of u and v.
+        """
+        neutral = 1 - absorbing
+        var, lo, hi = self._var, self._lo, self._hi
+        mk = self.mk
+        values: List[int] = []
+        stack = [((u, v), -1)]
+        push, pop, emit = stack.append, stack.pop, values.append
+        while stack:
+            (a, b), top = pop()
+            if top >= 0:
+                r1 = values.pop()
+                r = mk(top, values.pop(), r1)
+                cache.put((a, b), r)
+                emit(r)
+                continue
+            if a == absorbing or b == absorbing:
+                emit(absorbing)
+                continue
+            if a == neutral or a == b:
+                emit(b)
+                continue
+            if b == neutral:
+                emit(a)
+                continue
+            if a > b:
+                a, b = b, a
+            r = cache.get((a, b))
+            if r is not None:
+                emit(r)
+                continue
+            va, vb = var[a], var[b]
+            if va == vb:
+                top, a0, a1, b0, b1 = va, lo[a], hi[a], lo[b], hi[b]
+            elif va < vb:
+                top, a0, a1, b0, b1 = va, lo[a], hi[a], b, b
+            else:
+                top, a0, a1, b0, b1 = vb, a, a, lo[b], hi[b]
+            push(((a, b), top))
+            push(((a1, b1), -1))
+            push(((a0, b0), -1))
+        return values[0]
+
+    def DIFF(self, u: int, v: int) -> int:
+        """
+        u & ~v
+        """
+        return self.AND(u, self.NOT(v))
+
+    def ITE(self, f: int, g: int, h: int) -> int:
+        var = self._var
+        cache, mk, cofactors = self._ite, self.mk, self._cofactors
+        values: List[int] = []
+        stack = [((f, g, h), -1)]
+        while stack:
+            key, top = stack.pop()
+            if top >= 0:
+                r1 = values.pop()
+                r = mk(top, values.pop(), r1)
+                cache.put(key, r)
+                values.append(r)
+                continue
+            f, g, h = key
+            if f == TRUE:
+                r = g
+            elif f == FALSE:
+                r = h
+            elif g == h:
+                r = g
+            elif g == TRUE and h == FALSE:
+                r = f
+            else:
+                r = cache.get(key)
+            if r is not None:
+                values.append(r)
+                continue
+            top = min(var[f], var[g], var[h])
+            f0, f1 = cofactors(f, top)
+            g0, g1 = cofactors(g, top)
+            h0, h1 = cofactors(h, top)
+            stack.append((key, top))
+            stack.append(((f1, g1, h1), -1))
+            stack.append(((f0, g0, h0), -1))
+        return values[0]
+
+    def _cofactors(self, u: int, top: int) -> Tuple[int, int]:
+        if self._var[u] == top:
+            return self._lo[u], self._hi[u]
+        return u, u
+
+    # --- Quantification and substitution ---
+    # Same explicit-stack scheme; a frame whose top is quantified away
+    # combines its cofactor results with OR instead of mk.
+
+    def exists(self, u: int, cube: int) -> int:
+        """
+        Existential quantification of the positive variables in cube.
+        """
+        var, lo, hi = self._var, self._lo, self._hi
+        cache = self._exists
+        values: List[int] = []
+        stack = [((u, cube), -1, False)]
+        while stack:
+            key, top, quantified = stack.pop()
+            if top >= 0:
+                r1 = values.pop()
+                r0 = values.pop()
+                r = self.OR(r0, r1) if quantified else self.mk(top, r0, r1)
+                cache.put(key, r)
+                values.append(r)
+                continue
+            n, c = key
+            if n < 2 or c == TRUE:
+                values.append(n)
+                continue
+            while c != TRUE and var[c] < var[n]:
+                c = hi[c]
+            if c == TRUE:
+                values.append(n)
+                continue
+            key = (n, c)
+            r = cache.get(key)
+            if r is not None:
+                values.append(r)
+                continue
+            quantified = var[c] == var[n]
+            rest = hi[c] if quantified else c
+            stack.append((key, var[n], quantified))
+            stack.append(((hi[n], rest), -1, False))
+            stack.append(((lo[n], rest), -1, False))
+        return values[0]
+
+    def and_exists(self, u: int, v: int, cube: int) -> int:
+        """
+        Relational product: exists cube . (u & v), without building u & v.
+        """
+        var, hi = self._var, self._hi
+        cache, cofactors = self._and_exists, self._cofactors
+        values: List[int] = []
+        # Frame stages: 0 evaluate, 1 combine with mk, 2 quantified top
+        # after the 0-cofactor (the 1-cofactor is skipped if that gave
+        # TRUE), 3 OR the two quantified results
+        stack: List[Tuple[Tuple[int, int, int], int, int, Any]] = [((u, v, cube), 0, -1, None)]
+        while stack:
+            key, stage, top, pending = stack.pop()
+            if stage == 1:
+                r1 = values.pop()
+                r = self.mk(top, values.pop(), r1)
+                cache.put(key, r)
+                values.append(r)
+                continue
+            if stage == 2:
+                if values[-1] == TRUE:
+                    cache.put(key, TRUE)
+                    continue
+                stack.append((key, 3, top, None))
+                stack.append((pending, 0, -1, None))
+                continue
+            if stage == 3:
+                r1 = values.pop()
+                r = self.OR(values.pop(), r1)
+                cache.put(key, r)
+                values.append(r)
+                continue
+
+            a, b, c = key
+            if a == FALSE or b == FALSE:
+                values.append(FALSE)
+                continue
+            if c == TRUE:
+                values.append(self.AND(a, b))
+                continue
+            if a == TRUE or a == b:
+                values.append(self.exists(b, c))
+                continue
+            if b == TRUE:
+                values.append(self.exists(a, c))
+                continue
+            if a > b:
+                a, b = b, a
+            top = min(var[a], var[b])
+            while c != TRUE and var[c] < top:
+                c = hi[c]
+            if c == TRUE:
+                values.append(self.AND(a, b))
+                continue
+            key = (a, b, c)
+            r = cache.get(key)
+            if r is not None:
+                values.append(r)
+                continue
+            a0, a1 = cofactors(a, top)
+            b0, b1 = cofactors(b, top)
+            if var[c] == top:
+                rest = hi[c]
+                stack.append((key, 2, top, (a1, b1, rest)))
+                stack.append(((a0, b0, rest), 0, -1, None))
+            else:
+                stack.append((key, 1, top, None))
+                stack.append(((a1, b1, c), 0, -1, None))
+                stack.append(((a0, b0, c), 0, -1, None))
+        return values[0]
+
+    def rename(self, u: int, mapping: Dict[int, int]) -> int:
+        """
+        Substitutes variable mapping[v] for v (simultaneously).
+
+        Order-preserving renamings rebuild each node with a single mk, since
+        ITE(var, hi, lo) with var above both branches is one unique-table
+        lookup; other renamings still work through the general ITE.
+        """
+        memo = {FALSE: FALSE, TRUE: TRUE}
+        for n in self._postorder(u):
+            v = self._var[n]
+            target = mapping.get(v, v)
+            memo[n] = self.ITE(self.var(target), memo[self._hi[n]], memo[self._lo[n]])
+        return memo[u]
+
+    def restrict(self, u: int, point: Dict[int, int]) -> int:
+        """
+        Cofactor by a partial assignment {level: 0/1}.
+        """
+        memo = {FALSE: FALSE, TRUE: TRUE}
+        for n in self._postorder(u):
+            v = self._var[n]
+            if v in point:
+                memo[n] = memo[self._hi[n] if point[v] else self._lo[n]]
+            else:
+                memo[n] = self.mk(v, memo[self._lo[n]], memo[self._hi[n]])
+        return memo[u]
+
+    # --- Inspection ---
+
+    def nodes(self, u: int) -> List[int]:
+        """
+        Node ids reachable from u (terminals included), in DFS preorder.
+        """
+        seen = set()
+        out = []
+        stack = [u]
+        while stack:
+            n = stack.pop()
+            if n in seen:
+                continue
+            seen.add(n)
+            out.append(n)
+            if n >= 2:
+                stack.append(self._hi[n])
+                stack.append(self._lo[n])
+        return out
+
+    def _postorder(self, u: int) -> List[int]:
+        """
+        Internal node ids reachable from u, every node after its children.
+        """
+        done = set()
+        out = []
+        stack = [(u, False)]
+        while stack:
+            n, expanded = stack.pop()
+            if n < 2 or n in done:
+                continue
+            if expanded:
+                done.add(n)
+                out.append(n)
+                continue
+            stack.append((n, True))
+            stack.append((self._hi[n], False))
+            stack.append((self._lo[n], False))
+        return out
+
+    def support(self, u: int) -> List[int]:
+        return sorted({self._var[n] for n in self.nodes(u) if n >= 2})
+
+    def count(self, u: int, levels: Sequence[int]) -> int:
+        """
+        Number of assignments to the given levels that satisfy u.
+        u must not depend on any other level.
+        """
+        levels = sorted(levels)
+        rank = {v: k for k, v in enumerate(levels)}
+        n = len(levels)
+
+        def rank_of(x: int) -> int:
+            return n if x < 2 else rank[self._var[x]]
+
+        memo = {FALSE: 0, TRUE: 1}
+        for x in self._postorder(u):
+            k = rank_of(x)
+            lo, hi = self._lo[x], self._hi[x]
+            memo[x] = (memo[lo] << (rank_of(lo) - k - 1)) + (memo[hi] << (rank_of(hi) - k - 1))
+        return memo[u] << rank_of(u)
+
+    def paths(self, u: int) -> Iterator[Dict[int, int]]:
+        """
+        Every path from u to TRUE as a partial assignment {level: 0/1}.
+        """
+        if u == FALSE:
+            return
+        stack: List[Tuple[int, Dict[int, int]]] = [(u, {})]
+        while stack:
+            n, point = stack.pop()
+            if n == TRUE:
+                yield point
+                continue
+            if n == FALSE:
+                continue
+            v = self._var[n]
+            stack.append((self._hi[n], {**point, v: 1}))
+            stack.append((self._lo[n], {**point, v: 0}))
+
+    def cache_stats(self) -> Dict[str, Tuple[int, int]]:
+        """
+        (hits, misses) per computed table.
+        """
+        return {
+            name: (cache.hits, cache.misses)
+            for name, cache in (
+                ("and", self._and), ("or", self._or), ("not", self._not),
+                ("ite", self._ite), ("exists", self._exists),
+                ("and_exists", self._and_exists),
+            )
+        }
+
+
+# ---------------------------
+# PyEDA-compatible handles
+# ---------------------------
+# NativeBDD exposes the subset of the PyEDA BinaryDecisionDiagram API the
+# rest of the project uses (is_zero, restrict, support, satisfy_all, ...),
+# so deadlock_detecting and max_reachable_marking accept either backend.
+
+class NativeVar:
+    """
+    A variable of a BDDManager; names/name/uniqid mirror PyEDA variables.
+    """
+
+    __slots__ = ("manager", "name", "level")
+
+    def __init__(self, manager: BDDManager, name: str, level: int):
+        self.manager = manager
+        self.name = name
+        self.level = level
+
+    @property
+    def names(self) -> Tuple[str]:
+        return (self.name,)
+
+    @property
+    def uniqid(self) -> int:
+        return self.level
+
+    def __str__(self) -> str:
+        return self.name
+
+    __repr__ = __str__
+
+    def __hash__(self) -> int:
+        return hash((id(self.manager), self.level))
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, NativeVar)
+            and other.manager is self.manager
+            and other.level == self.level
+        )
+
+    def __lt__(self, other: "NativeVar") -> bool:
+        return self.level < other.level
+
+
+class NativeBDD:
+    """
+    A node of a BDDManager, usable where a PyEDA BDD is expected.
+    """
+
+    __slots__ = ("manager", "node")
+
+    def __init__(self, manager: BDDManager, node: int):
+        self.manager = manager
+        self.node = node
+
+    def is_zero(self) -> bool:
+        return self.node == FALSE
+
+    def is_one(self) -> bool:
+        return self.node == TRUE
+
+    def __and__(self, other: "NativeBDD") -> "NativeBDD":
+        return NativeBDD(self.manager, self.manager.AND(self.node, other.node))
+
+    def __or__(self, other: "NativeBDD") -> "NativeBDD":
+        return NativeBDD(self.manager, self.manager.OR(self.node, other.node))
+
+    def __invert__(self) -> "NativeBDD":
+        return NativeBDD(self.manager, self.manager.NOT(self.node))
+
+    def equivalent(self, other: "NativeBDD") -> bool:
+        return self.manager is other.manager and self.node == other.node
+
+    @property
+    def support(self) -> frozenset:
+        return frozenset(self.manager.vars[v] for v in self.manager.support(self.node))
+
+    @property
+    def inputs(self) -> Tuple[NativeVar, ...]:
+        return tuple(sorted(self.support))
+
+    def restrict(self, point: Dict[Any, int]) -> "NativeBDD":
+        levels = {v.level: int(val) for v, val in point.items()}
+        return NativeBDD(self.manager, self.manager.restrict(self.node, levels))
+
+    def satisfy_all(self) -> Iterator[Dict[NativeVar, int]]:
+        vars_ = self.manager.vars
+        for point in self.manager.paths(self.node):
+            yield {vars_[v]: val for v, val in point.items()}
+
+    def satisfy_one(self) -> Optional[Dict[NativeVar, int]]:
+        return next(self.satisfy_all(), None)
+
+    def node_count(self) -> int:
+        return len(self.manager.nodes(self.node))
+
+    def to_dot(self, name: str = "BDD") -> str:
+        """
+        Graphviz source in the same shape as PyEDA's to_dot().
+        """
+        mgr = self.manager
+        lines = [f"graph {name} {{"]
+        for n in mgr.nodes(self.node):
+            if n < 2:
+                lines.append(f'n{n} [label={n},shape=box];')
+            else:
+                lines.append(f'n{n} [label="{mgr.vars[mgr.level(n)].name}",shape=circle];')
+        for n in mgr.nodes(self.node):
+            if n >= 2:
+                lines.append(f"n{n} -- n{mgr.low(n)} [label=0,style=dashed];")
+                lines.append(f"n{n} -- n{mgr.high(n)} [label=1];")
+        lines.append("}")
+        return "\n".join(lines)
+
+    def to_pyeda(self, var_map: Dict[int, Any]):
+        """
+        Rebuilds the function as a PyEDA BDD, for cross-checking.
+
+        Args:
+            var_map: PyEDA variable for every level in the support.
+        """
+        from pyeda.inter import expr, expr2bdd
+
+        mgr = self.manager
+        one = expr2bdd(expr("1"))
+        zero = expr2bdd(expr("0"))
+        memo: Dict[int, Any] = {FALSE: zero, TRUE: one}
+        for n in mgr._postorder(self.node):
+            x = var_map[mgr.level(n)]
+            memo[n] = (x & memo[mgr.high(n)]) | (~x & memo[mgr.low(n)])
+        return memo[self.node]
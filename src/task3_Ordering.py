@@ -0,0 +1,122 @@
+import numpy as np
+from typing import List, Sequence, Union
+from .task1_PetriNet import PetriNet
+
+# ---------------------------
+# Static variable ordering heuristics
+# ---------------------------
+# Each heuristic returns a permutation of place indices: order[k] is the
+# place whose BDD variable is created k-th (k = 0 is the root level).
+# They only look at the net structure, so they run before any BDD
+# variable exists.
+
+def order_natural(pn: PetriNet) -> List[int]:
+    """
+    PNML document order (what bdd_reachable used originally).
+    """
+    return list(range(len(pn.place_ids)))
+
+
+def order_dfs(pn: PetriNet) -> List[int]:
+    """
+    Depth-first traversal of the place/transition graph.
+
+    Starts from the places marked in M0; from a place, each consuming
+    transition is followed to its input places and then its output places,
+    so places that are read and written together get adjacent levels.
+    Places not reached are appended in document order.
+    """
+    P = pn.num_places
+    consumers = [[t for t, _ in col] for col in pn.pre.columns()]
+    neighbours = []
+    for p in range(P):
+        nxt = []
+        for t in consumers[p]:
+            nxt += pn.pre.places(t)
+            nxt += pn.post.places(t)
+        neighbours.append(nxt)
+
+    order: List[int] = []
+    seen = set()
+    roots = [p for p in range(P) if pn.M0[p] > 0] + list(range(P))
+    for root in roots:
+        if root in seen:
+            continue
+        stack = [root]
+        while stack:
+            p = stack.pop()
+            if p in seen:
+                continue
+            seen.add(p)
+            order.append(p)
+            # Reversed so the first neighbour is visited first
+            stack.extend(q for q in reversed(neighbours[p]) if q not in seen)
+    return order
+
+
+def order_force(pn: PetriNet, iterations: int = 50) -> List[int]:
+    """
+    FORCE heuristic: places connected by a transition are pulled together.
+
+    Every transition is a hyperedge over the places it touches. Each round
+    moves each place to the mean centre of gravity of its hyperedges and
+    re-sorts; it stops when the total hyperedge span no longer shrinks.
+    Starts from the DFS order.
+    """
+    P = pn.num_places
+    edges = [
+        sorted(set(pn.pre.places(t)) | set(pn.post.places(t)))
+        for t in range(pn.num_transitions)
+    ]
+    edges = [e for e in edges if len(e) > 1]
+    if not edges:
+        return order_dfs(pn)
+
+    def span(pos: np.ndarray) -> float:
+        return float(sum(pos[e].max() - pos[e].min() for e in edges))
+
+    order = order_dfs(pn)
+    pos = np.empty(P)
+    pos[order] = np.arange(P)
+    best_order, best_span = order, span(pos)
+
+    for _ in range(iterations):
+        total = np.zeros(P)
+        degree = np.zeros(P)
+        for e in edges:
+            total[e] += pos[e].mean()
+            degree[e] += 1
+        target = np.where(degree > 0, total / np.maximum(degree, 1), pos)
+
+        order = sorted(range(P), key=lambda p: (target[p], pos[p]))
+        pos = np.empty(P)
+        pos[order] = np.arange(P)
+
+        s = span(pos)
+        if s >= best_span:
+            break
+        best_order, best_span = order, s
+
+    return best_order
+
+
+ORDERINGS = {
+    "natural": order_natural,
+    "dfs": order_dfs,
+    "force": order_force,
+}
+
+
+def variable_order(pn: PetriNet, heuristic: Union[str, Sequence[int]] = "natural") -> List[int]:
+    """
+    Resolves a heuristic name (see ORDERINGS) or an explicit permutation.
+    """
+    if isinstance(heuristic, str):
+        if heuristic not in ORDERINGS:
+            raise ValueError(f"Unknown variable ordering: {heuristic}")
+        return ORDERINGS[heuristic](pn)
+
+    order = [int(p) for p in heuristic]
+    if sorted(order) != list(range(len(pn.place_ids))):
+        raise ValueError("Variable order must be a permutation of the place indices")
+    return order
@@ -1,26 +1,146 @@
-import pulp
-from typing import List, Optional
-from pyeda.inter import *
+from __future__ import annotations
+
+import time
+import numpy as np
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 from .task1_PetriNet import PetriNet
+from .task2_BFS import bfs_reachable_packed, compile_masks, pack_marking, unpack_marking
+from .task3_BDD import (
+    FlatBDD, bdd_contains, bdd_contains_many, bdd_place_vars,
+    count_markings, flatten_bdd,
+)
+from .task3_NativeBDD import NativeBDD, TRUE
+from .lazy import lazy_import
+
+# Loaded on first use: only the ILP method needs them
+pulp = lazy_import("pulp")
+highspy = lazy_import("highspy")     # optional: only needed for solver="highs"
+# Only the PyEDA backend needs it (task3_BDD applies its compatibility fix)
+pyeda_bdd = lazy_import("pyeda.boolalg.bdd")
+
+if TYPE_CHECKING:
+    from pyeda.boolalg.bdd import BinaryDecisionDiagram
+
+
+class DeadlockSearchCapped(RuntimeError):
+    """
+    deadlock_detecting hit max_rounds before it could answer: the net may
+    or may not have a reachable deadlock.
+    """
+
 
 def deadlock_detecting(
     pn: PetriNet,
     bdd: BinaryDecisionDiagram,
+    method: str = "ilp",
+    stats: Optional[Dict[str, Any]] = None,
+    solver: str = "auto",
+    state_equation: bool = True,
+    max_rounds: Optional[int] = None,
+    place_vars: Optional[List[Any]] = None,
 ) -> Optional[List[int]]:
+    """
+    Finds a reachable dead marking, or None if there is none.
+
+    Args:
+        pn: The Petri net.
+        bdd: Reachable set from bdd_reachable (either backend).
+        method: "ilp" proposes dead candidates with an ILP solver and checks
+                them against the BDD; "symbolic" intersects the BDD with the
+                dead-marking predicate (see deadlock_symbolic); "por"
+                searches the stubborn-set reduced state graph explicitly
+                (see deadlock_por) and does not use bdd.
+        stats: Optional dict; "symbolic" stores "dead_markings" there,
+               "por" the deadlock_por stats,
+               "ilp" stores "solver", "rounds", "round_times" (solve +
+               BDD check, seconds), "solve_time" (ILP part, seconds in
+               total) and "capped".
+        solver: "cbc" re-solves the PuLP model with a fresh CBC process each
+                round; "highs" keeps one HiGHS instance alive and adds the
+                no-good cuts in place (needs the optional highspy package);
+                "auto" uses HiGHS when available.
+        state_equation: Add M = M0 + C·σ (σ ≥ 0 integer) so candidates that
+                        violate the state equation, and so are certainly
+                        unreachable, are never proposed.
+        max_rounds: Give up after this many candidates by raising
+                    DeadlockSearchCapped (stats are filled first, with
+                    stats["capped"] = True), so a capped search is never
+                    reported as deadlock-free.
+        place_vars: Place-index -> BDD variable list, as returned by
+                    bdd_reachable(..., return_vars=True). Looked up by name
+                    when omitted, which only works for the default order.
+    """
+    if method == "symbolic":
+        dead, count = deadlock_symbolic(pn, bdd, place_vars)
+        if stats is not None:
+            stats["dead_markings"] = count
+        return dead
+    if method == "por":
+        dead, por_stats = deadlock_por(pn)
+        if stats is not None:
+            stats.update(por_stats)
+        return dead
+    if method != "ilp":
+        raise ValueError(f"Unknown deadlock method: {method}")
 
     model, x, y = ILP_variable_setup(pn)
     ILP_add_dead_constraints(model, x, y, pn)
+    if state_equation:
+        ILP_add_state_equation(model, x, pn)
     add_objective(model, x)
 
+    if solver == "auto":
+        solver = "highs" if highspy is not None else "cbc"
+    if solver == "highs":
+        ilp = HighsIncremental(model, x)
+    elif solver == "cbc":
+        ilp = None
+    else:
+        raise ValueError(f"Unknown ILP solver: {solver}")
+
+    # Map places to BDD nodes once; each check is then a single walk
+    if place_vars is None:
+        place_vars = bdd_place_vars(pn, bdd)
+    flat = flatten_bdd(bdd, place_vars)
+
+    round_times: List[float] = []
+    solve_time = 0.0
+    result = None
+    capped = False
+
     while True:
-        candidate = candidate_from_ILP(model, x)
+        if max_rounds is not None and len(round_times) >= max_rounds:
+            capped = True
+            break
+
+        start_t = time.perf_counter()
+        candidate = ilp.candidate() if ilp else candidate_from_ILP(model, x)
+        solve_time += time.perf_counter() - start_t
         if candidate is None:
-            return None     # No more ILP solutions
+            round_times.append(time.perf_counter() - start_t)
+            break           # No more ILP solutions
+
+        reachable = is_reachable(candidate, pn, bdd, flat)
+        round_times.append(time.perf_counter() - start_t)
+        if reachable:
+            result = candidate
+            break
 
-        if is_reachable(candidate, pn, bdd):
-            return candidate
+        if ilp:
+            ilp.exclude(candidate)
+        else:
+            add_exclusion_constraint(model, x, candidate, pn)
 
-        add_exclusion_constraint(model, x, candidate, pn)
+    if stats is not None:
+        stats["solver"] = solver
+        stats["rounds"] = len(round_times)
+        stats["round_times"] = round_times
+        stats["solve_time"] = solve_time
+        stats["capped"] = capped
+    if capped:
+        raise DeadlockSearchCapped(f"No answer after {max_rounds} ILP rounds")
+    return result
 
 
 # ILP Setup
@@ -38,11 +158,10 @@ def ILP_variable_setup(pn: PetriNet):
 
 def ILP_add_dead_constraints(model, x, y, pn: PetriNet):
     # Add constraints: every transition must be disabled
-    T, P = pn.I.shape
-
-    for t in range(T):
-        pre = [pn.place_ids[i] for i in range(P) if pn.I[t][i] == 1]
-        out_only = [pn.place_ids[i] for i in range(P) if pn.O[t][i] == 1 and pn.I[t][i] == 0]
+    for t in range(pn.num_transitions):
+        inputs = pn.pre.places(t)
+        pre = [pn.place_ids[i] for i in inputs]
+        out_only = [pn.place_ids[i] for i in pn.post.places(t) if i not in inputs]
         y_t = y[pn.trans_ids[t]]
 
         # Transition with no pre-places
@@ -52,7 +171,9 @@ def ILP_add_dead_constraints(model, x, y, pn: PetriNet):
                 model += pulp.lpSum(x[p] for p in out_only) >= 1
             else:
                 # impossible to disable -> no deadlock possible
-                model += 0 <= -1
+                # (contradictory pair: a bare 0 <= -1 is just False to PuLP)
+                model += y_t == 0
+                model += y_t == 1
             continue
 
         # OR encoding:
@@ -68,6 +189,25 @@ def ILP_add_dead_constraints(model, x, y, pn: PetriNet):
             model += y_t == 0
 
 
+def ILP_add_state_equation(model, x, pn: PetriNet):
+    # State equation: M = M0 + C·σ with C = O - I and σ ≥ 0 the firing counts.
+    # Every reachable marking satisfies it, so it only removes candidates
+    # that are certainly unreachable.
+    sigma = {t: pulp.LpVariable(f"sigma_{t}", lowBound=0, cat="Integer") for t in pn.trans_ids}
+
+    # Column i of C, built from the sparse arcs: {transition: net effect}
+    C_cols = [{} for _ in pn.place_ids]
+    for col, sign in ((pn.post.columns(), 1), (pn.pre.columns(), -1)):
+        for i, arcs in enumerate(col):
+            for t, w in arcs:
+                C_cols[i][t] = C_cols[i].get(t, 0) + sign * w
+
+    for i, p in enumerate(pn.place_ids):
+        model += x[p] == int(pn.M0[i]) + pulp.lpSum(
+            c * sigma[pn.trans_ids[t]] for t, c in sorted(C_cols[i].items()) if c != 0
+        )
+
+
 def add_objective(model, x):
     model += pulp.lpSum(x.values())
 
@@ -89,30 +229,393 @@ def candidate_from_ILP(model, x):
         return None
     return [int(pulp.value(x[p])) for p in x]
 
+
+# ---------------------------
+# Incremental ILP (HiGHS)
+# ---------------------------
+# CBC through PuLP writes an LP file and starts a new process for every
+# solve. HiGHS runs in-process: the PuLP model is loaded once, each no-good
+# cut is appended as a row, and the next run reuses the same instance.
+
+class HighsIncremental:
+    """
+    One live HiGHS instance holding the PuLP model plus the no-good cuts.
+    """
+
+    def __init__(self, model: "pulp.LpProblem", x):
+        if highspy is None:
+            raise ImportError("solver='highs' needs the highspy package")
+
+        h = self.h = highspy.Highs()
+        h.setOptionValue("output_flag", False)
+        inf = highspy.kHighsInf
+
+        variables = model.variables()
+        self.col = {v.name: j for j, v in enumerate(variables)}
+        for v in variables:
+            lb = -inf if v.lowBound is None else v.lowBound
+            ub = inf if v.upBound is None else v.upBound
+            h.addCol(0.0, lb, ub, 0, [], [])
+        integer = [self.col[v.name] for v in variables if v.cat == pulp.LpInteger]
+        if integer:
+            h.changeColsIntegrality(
+                len(integer), integer, [highspy.HighsVarType.kInteger] * len(integer)
+            )
+
+        for v, coef in model.objective.items():
+            h.changeColCost(self.col[v.name], coef)
+        h.changeObjectiveSense(
+            highspy.ObjSense.kMinimize if model.sense == pulp.LpMinimize
+            else highspy.ObjSense.kMaximize
+        )
+
+        for c in model.constraints.values():
+            self._add_row(
+                {v.name: coef for v, coef in c.items()}, -c.constant, c.sense
+            )
+
+        self.x_cols = [self.col[x[p].name] for p in x]
+
+    def _add_row(self, coeffs: Dict[str, float], rhs: float, sense: int) -> None:
+        inf = highspy.kHighsInf
+        lo = rhs if sense in (pulp.LpConstraintGE, pulp.LpConstraintEQ) else -inf
+        hi = rhs if sense in (pulp.LpConstraintLE, pulp.LpConstraintEQ) else inf
+        idx = [self.col[name] for name in coeffs]
+        self.h.addRow(lo, hi, len(idx), idx, list(coeffs.values()))
+
+    def candidate(self) -> Optional[List[int]]:
+        # Solves the current model, returns a marking or None if infeasible
+        self.h.run()
+        if self.h.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            return None
+        values = self.h.getSolution().col_value
+        return [int(round(values[j])) for j in self.x_cols]
+
+    def exclude(self, candidate: List[int]) -> None:
+        # sum_{p: M(p)=0} x_p + sum_{p: M(p)=1} (1 - x_p) >= 1
+        idx = list(self.x_cols)
+        vals = [-1.0 if bit == 1 else 1.0 for bit in candidate]
+        rhs = 1 - sum(candidate)
+        self.h.addRow(rhs, highspy.kHighsInf, len(idx), idx, vals)
+
+
+# ---------------------------
+# Symbolic deadlock detection
+# ---------------------------
+
+def dead_predicate(pn: PetriNet, X, one: BinaryDecisionDiagram) -> BinaryDecisionDiagram:
+    """
+    BDD of the markings in which no transition is enabled.
+
+    Transition t is disabled when one of its input places is empty or one
+    of its output-only places is marked (1-safety). X are the place
+    variables as BDDs and one the constant TRUE of the same backend.
+    """
+    if not pn.is_unit():
+        raise ValueError("Dead predicate requires a 1-safe net with unit arcs")
+    zero = ~one
+    dead = one
+    for t in range(pn.num_transitions):
+        disabled = zero
+        inputs = pn.pre.places(t)
+        for i in inputs:
+            disabled |= ~X[i]
+        for i in pn.post.places(t):
+            if i not in inputs:
+                disabled |= X[i]
+        dead &= disabled
+        if dead.is_zero():
+            break
+
+    return dead
+
+
+def deadlock_symbolic(
+    pn: PetriNet,
+    bdd: BinaryDecisionDiagram,
+    place_vars: Optional[List[Any]] = None,
+) -> Tuple[Optional[List[int]], int]:
+    """
+    Dead marking extracted directly from Reach & Dead.
+
+    One BDD conjunction, then a single root-to-leaf path gives the marking
+    (places not on the path are don't-cares and set to 0), and the exact
+    model count gives the number of reachable dead markings.
+
+    place_vars is the variable list from bdd_reachable(..., return_vars=True)
+    (looked up by name when omitted).
+
+    Returns:
+        Tuple: (dead_marking or None, number of reachable dead markings)
+    """
+    X = place_vars if place_vars is not None else bdd_place_vars(pn, bdd)
+    if isinstance(bdd, NativeBDD):
+        mgr = bdd.manager
+        X_bdd = [NativeBDD(mgr, mgr.var(v.level)) for v in X]
+        one = NativeBDD(mgr, TRUE)
+    else:
+        X_bdd = X
+        one = pyeda_bdd.BDDONE
+
+    D = bdd & dead_predicate(pn, X_bdd, one)
+    if D.is_zero():
+        return None, 0
+
+    point = D.satisfy_one()
+    marking = [int(point.get(X[i], 0)) for i in range(len(X))]
+    return marking, count_markings(D, X)
+
+
 # BDD checking reachables
-def is_reachable(candidate, pn: PetriNet, bdd: BinaryDecisionDiagram):
-    assign = {}
-    for var in bdd.support:
-        name = var.name
-        try:
-            num_str = "".join(filter(str.isdigit, name))
-            idx = int(num_str) - 1
-        except ValueError:
+def is_reachable(
+    candidate,
+    pn: PetriNet,
+    bdd: BinaryDecisionDiagram,
+    flat: Optional[FlatBDD] = None,
+) -> bool:
+    """
+    Whether a marking is in the reachable set, by one root-to-leaf walk.
+
+    flat is the precomputed FlatBDD of bdd (built here when omitted); its
+    nodes refer to place indices, so place names do not matter.
+    """
+    if flat is None:
+        flat = flatten_bdd(bdd, bdd_place_vars(pn, bdd))
+    return bdd_contains(flat, candidate)
+
+
+def is_reachable_batch(
+    candidates,
+    pn: PetriNet,
+    bdd: BinaryDecisionDiagram,
+    flat: Optional[FlatBDD] = None,
+) -> np.ndarray:
+    """
+    Batched is_reachable: (N x places) candidates -> N bools.
+    """
+    if flat is None:
+        flat = flatten_bdd(bdd, bdd_place_vars(pn, bdd))
+    return bdd_contains_many(flat, np.asarray(candidates))
+
+
+# ---------------------------
+# Partial-order reduction
+# ---------------------------
+# Explicit-state deadlock search that fires only a stubborn subset of the
+# enabled transitions in each marking. Stubborn sets are closed under:
+#   - enabled t: every transition dependent on t (they share a place that
+#     one of them changes), so the order between them is preserved;
+#   - disabled t: every transition able to remove one chosen reason why t
+#     is disabled (producers of an empty input place, or consumers of a
+#     marked output-only place, which blocks t under 1-safety).
+# Such sets preserve all reachable deadlocks of the full state graph.
+
+def _stubborn_structure(pn: PetriNet):
+    """
+    Precomputes the bit masks and dependency lists used by stubborn sets.
+    """
+    pre, post, block = compile_masks(pn)
+    T = len(pre)
+    P = len(pn.place_ids)
+
+    writes = [pre[t] ^ post[t] for t in range(T)]    # places whose token changes
+    touch = [pre[t] | block[t] | writes[t] for t in range(T)]
+
+    deps = [
+        [u for u in range(T)
+         if u != t and (writes[t] & touch[u] or writes[u] & touch[t])]
+        for t in range(T)
+    ]
+    producers = [[u for u in range(T) if (post[u] & ~pre[u]) >> p & 1] for p in range(P)]
+    consumers = [[u for u in range(T) if (pre[u] & ~post[u]) >> p & 1] for p in range(P)]
+
+    return pre, post, block, deps, producers, consumers
+
+
+def _stubborn_set(m, seed, pre, block, deps, producers, consumers) -> Set[int]:
+    """
+    Closure of {seed} under the stubborn set rules in marking m.
+    """
+    stub = {seed}
+    work = [seed]
+
+    while work:
+        t = work.pop()
+        if m & pre[t] == pre[t] and not m & block[t]:
+            add = deps[t]
+        else:
+            # Pick the cheapest reason that keeps t disabled
+            add = None
+            reasons = [producers[p] for p in _bits(pre[t] & ~m)]
+            reasons += [consumers[p] for p in _bits(block[t] & m)]
+            for cand in reasons:
+                if add is None or sum(u not in stub for u in cand) < sum(u not in stub for u in add):
+                    add = cand
+            add = add or []
+
+        for u in add:
+            if u not in stub:
+                stub.add(u)
+                work.append(u)
+
+    return stub
+
+
+def _bits(mask: int) -> List[int]:
+    """
+    Indices of the set bits of mask.
+    """
+    out = []
+    i = 0
+    while mask:
+        if mask & 1:
+            out.append(i)
+        mask >>= 1
+        i += 1
+    return out
+
+
+def deadlock_por(
+    pn: PetriNet,
+    compare_full: bool = False,
+) -> Tuple[Optional[List[int]], Dict[str, Optional[int]]]:
+    """
+    Deadlock search on the stubborn-set reduced state graph.
+
+    Explores the reduced graph in BFS order; the first dead marking found is
+    one at minimal depth in the reduced graph.
+
+    Args:
+        pn (PetriNet): A 1-safe Petri net with unit arcs.
+        compare_full (bool): Also run the full bitset BFS to report the
+                             unreduced state count.
+
+    Returns:
+        Tuple: (dead_marking, stats)
+            - dead_marking: A reachable deadlock (List[int]) or None.
+            - stats: "reduced_states", "full_states" (None unless
+                     compare_full), and "deadlocks" (dead markings found).
+    """
+    pre, post, block, deps, producers, consumers = _stubborn_structure(pn)
+    T = len(pre)
+    num_places = len(pn.place_ids)
+
+    m0 = pack_marking(pn.M0)
+    visited = {m0}
+    queue = deque([m0])
+    first_dead = None
+    dead_count = 0
+
+    while queue:
+        m = queue.popleft()
+        enabled = [t for t in range(T) if m & pre[t] == pre[t] and not m & block[t]]
+
+        if not enabled:
+            dead_count += 1
+            if first_dead is None:
+                first_dead = m
             continue
-            
-        if 0 <= idx < len(candidate):
-            assign[var] = candidate[idx]
-    if not assign:
-        return False
-        
-    return bdd.restrict(assign).is_one()
-
-
-# def is_reachable(candidate, pn: PetriNet, bdd: BinaryDecisionDiagram):
-#     assign = {}
-#     for var in bdd.support:
-#         name = var.name      # ex: "p3"
-#         idx = int(name[1:])  # take the mum 3
-#         assign[var] = candidate[idx]
-
-#     return bdd.restrict(assign).is_one()
\ No newline at end of file
+
+        # Smallest stubborn set over all enabled seeds
+        best = None
+        for seed in enabled:
+            stub = _stubborn_set(m, seed, pre, block, deps, producers, consumers)
+            fire = [t for t in enabled if t in stub]
+            if best is None or len(fire) < len(best):
+                best = fire
+                if len(best) == 1:
+                    break
+
+        for t in best:
+            next_m = (m & ~pre[t]) | post[t]
+            if next_m not in visited:
+                visited.add(next_m)
+                queue.append(next_m)
+
+    stats: Dict[str, Optional[int]] = {
+        "reduced_states": len(visited),
+        "full_states": len(bfs_reachable_packed(pn)) if compare_full else None,
+        "deadlocks": dead_count,
+    }
+    dead = list(unpack_marking(first_dead, num_places)) if first_dead is not None else None
+    return dead, stats
+
+
+# ---------------------------
+# On-the-fly deadlock detection
+# ---------------------------
+
+def deadlock_on_the_fly(
+    pn: PetriNet,
+    strategy: str = "bfs",
+) -> Tuple[Optional[List[int]], Optional[List[str]], Dict[str, float]]:
+    """
+    Explores the state space only until the first dead marking is reached.
+
+    Each visited marking keeps a single parent pointer, packed as one int
+    (parent marking << tbits | transition index), so the witness is rebuilt
+    by walking back from the deadlock instead of storing paths.
+
+    Args:
+        pn (PetriNet): A 1-safe Petri net with unit arcs.
+        strategy (str): "bfs" returns a shortest firing sequence,
+                        "dfs" returns any firing sequence (often found sooner
+                        on deep nets).
+
+    Returns:
+        Tuple: (dead_marking, firing_sequence, stats)
+            - dead_marking: The first deadlock found (List[int]) or None.
+            - firing_sequence: Transition ids leading from M0 to it, or None.
+            - stats: "states" explored and "time" to first deadlock (or to
+                     exhaustion when there is none), in seconds.
+    """
+    if strategy not in ("bfs", "dfs"):
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    start_t = time.perf_counter()
+    pre, post, block = compile_masks(pn)
+    T = len(pre)
+    tbits = max(1, T.bit_length())
+    num_places = len(pn.place_ids)
+
+    def is_dead(m: int) -> bool:
+        for t in range(T):
+            if m & pre[t] == pre[t] and not m & block[t]:
+                return False
+        return True
+
+    m0 = pack_marking(pn.M0)
+    parent: Dict[int, int] = {m0: -1}    # -1 marks the root
+    frontier = deque([m0])
+    pop = frontier.popleft if strategy == "bfs" else frontier.pop
+    dead = m0 if is_dead(m0) else None
+
+    while frontier and dead is None:
+        m = pop()
+        for t in range(T):
+            if m & pre[t] != pre[t] or m & block[t]:
+                continue
+            next_m = (m & ~pre[t]) | post[t]
+            if next_m in parent:
+                continue
+            parent[next_m] = (m << tbits) | t
+            # Checked on generation so the search stops as early as possible
+            if is_dead(next_m):
+                dead = next_m
+                break
+            frontier.append(next_m)
+
+    stats = {"states": len(parent), "time": time.perf_counter() - start_t}
+    if dead is None:
+        return None, None, stats
+
+    # Walk the parent pointers back to M0
+    sequence = []
+    m = dead
+    while parent[m] != -1:
+        link = parent[m]
+        sequence.append(pn.trans_ids[link & ((1 << tbits) - 1)])
+        m = link >> tbits
+    sequence.reverse()
+
+    return list(unpack_marking(dead, num_places)), sequence, stats
@@ -1,72 +1,257 @@
-import collections
-from typing import Tuple, List, Optional
-from pyeda.inter import *
-from collections import deque
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 import numpy as np
+from .task3_BDD import FlatBDD, bdd_vars_by_name, flatten_bdd
+
+if TYPE_CHECKING:
+    from pyeda.boolalg.bdd import BinaryDecisionDiagram
 
 def max_reachable_marking(
-    place_ids: List[str], 
-    bdd: BinaryDecisionDiagram, 
-    c: np.ndarray
+    place_ids: List[str],
+    bdd: BinaryDecisionDiagram,
+    c: np.ndarray,
+    place_vars: Optional[Sequence[Any]] = None,
+    top_k: Optional[int] = None,
 ) -> Tuple[Optional[List[int]], Optional[int]]:
     """
     Finds a reachable marking M that maximizes the linear objective function c^T * M.
-    This function iterates through all satisfying assignments of the BDD representing 
-    the reachable set and calculates the objective value for each marking.
-    
+    The BDD is treated as a DAG whose root-to-TRUE paths are the reachable
+    markings, and the best path is found by dynamic programming over its
+    nodes (longest path), in time linear in the BDD size.
+
     Args:
-        place_ids: List of place names corresponding to BDD variables.
+        place_ids: Names of the BDD variables, one per place (used only
+                   when place_vars is not given).
         bdd: The BDD representing the set of all reachable markings (from Task 3).
         c: A numpy array of integer weights corresponding to place_ids.
-        
+        place_vars: Place-index -> BDD variable list from
+                    bdd_reachable(..., return_vars=True). Preferred over
+                    name matching, which breaks when variables are renamed.
+        top_k: If given, also return the k best reachable markings.
+
     Returns:
-        Tuple: (best_marking, max_value)
+        Tuple: (best_marking, max_value) or, with top_k,
+               (best_marking, max_value, top) where top is a list of up to
+               k (marking, value) pairs sorted by decreasing value.
             - best_marking: The marking (List[int]) that yields the maximum value.
             - max_value: The maximum calculated objective value.
             - Returns (None, None) if the reachable set is empty.
     """
-    
+
     # Case 1: The BDD represents an empty set (No reachable markings)
+    if bdd.is_zero():
+        return (None, None, []) if top_k else (None, None)
+
+    if place_vars is None:
+        place_vars = bdd_vars_by_name(place_ids, bdd)
+    # One weight per place (extra entries of c are ignored)
+    weights = np.asarray(c).tolist()[:len(place_vars)]
+    flat = flatten_bdd(bdd, list(place_vars))
+
+    if top_k:
+        top = top_k_markings(flat, weights, top_k)
+        best_marking, max_val = top[0]
+        return best_marking, max_val, top
+
+    return longest_path(flat, weights)
+
+
+def longest_path(flat: FlatBDD, weights: List[Any]) -> Tuple[List[int], Any]:
+    """
+    Max-weight root-to-TRUE path of a flattened BDD.
+
+    best[u] is the best value over the places at u's level and below. Taking
+    the 1-edge of a node on place p adds weights[p]. When an edge skips
+    levels, the skipped places are don't-cares and each one adds its weight
+    if positive (it is set to 1), which is a prefix-sum lookup over the
+    variable order. Places without a variable are free on every path.
+    Nodes are stored children-first, so one forward pass suffices.
+    """
+    order = flat.order
+    n = len(order)
+    gain = [max(weights[p], 0) for p in order]
+    prefix = [0] * (n + 1)
+    for k in range(n):
+        prefix[k + 1] = prefix[k] + gain[k]
+
+    place, rank, lo, hi = (a.tolist() for a in (flat.place, flat.rank, flat.lo, flat.hi))
+    num_nodes = len(place)
+    NEG = float("-inf")
+    best = [NEG, 0] + [NEG] * (num_nodes - 2)
+    take_hi = [False] * num_nodes
+
+    for u in range(2, num_nodes):
+        k = rank[u]
+        v0 = best[lo[u]]
+        if v0 != NEG:
+            v0 += prefix[rank[lo[u]]] - prefix[k + 1]
+        v1 = best[hi[u]]
+        if v1 != NEG:
+            v1 += weights[place[u]] + prefix[rank[hi[u]]] - prefix[k + 1]
+        if v1 > v0:
+            best[u], take_hi[u] = v1, True
+        else:
+            best[u] = v0
+
+    # Rebuild the argmax: don't-cares take 1 exactly when their weight is positive
+    marking = [1 if w > 0 else 0 for w in weights]
+    u = flat.root
+    while u > 1:
+        marking[place[u]] = 1 if take_hi[u] else 0
+        u = hi[u] if take_hi[u] else lo[u]
+
+    value = sum(w for w, bit in zip(weights, marking) if bit)
+    return marking, value
+
+
+def top_k_markings(flat: FlatBDD, weights: List[Any], k: int) -> List[Tuple[List[int], Any]]:
+    """
+    The k best reachable markings (distinct), by value.
+
+    Same DP as longest_path, but every node keeps its k best
+    (value, set-places bitmask) entries. A skipped place is a free 0/1
+    choice, so a run of skipped levels contributes its own k-best list.
+    Cost grows with k^2 per node; meant for small k.
+    """
+    order = flat.order
+    num_places = len(weights)
+    ranked = set(order)
+    place, rank, lo, hi = (a.tolist() for a in (flat.place, flat.rank, flat.lo, flat.hi))
+
+    def merge(a, b):
+        # k best sums of one entry from a and one from b
+        out = sorted(((va + vb, ma | mb) for va, ma in a for vb, mb in b), key=lambda e: -e[0])
+        return out[:k]
+
+    def choices(places):
+        # k best assignments of free places
+        out = [(0, 0)]
+        for p in places:
+            out = merge(out, [(weights[p], 1 << p), (0, 0)])
+        return out
+
+    gap_cache: Dict[Tuple[int, int], list] = {}
+
+    def gap(a: int, b: int):
+        if (a, b) not in gap_cache:
+            gap_cache[(a, b)] = choices(order[a:b])
+        return gap_cache[(a, b)]
+
+    best: List[list] = [[], [(0, 0)]]
+    for u in range(2, len(place)):
+        r = rank[u]
+        p = place[u]
+        via_lo = merge(best[lo[u]], gap(r + 1, rank[lo[u]]))
+        via_hi = merge(best[hi[u]], gap(r + 1, rank[hi[u]]))
+        via_hi = [(v + weights[p], m | (1 << p)) for v, m in via_hi]
+        best.append(sorted(via_lo + via_hi, key=lambda e: -e[0])[:k])
+
+    root = flat.root
+    entries = merge(best[root], gap(0, rank[root]))
+    free = [p for p in range(num_places) if p not in ranked]
+    entries = merge(entries, choices(free))
+
+    return [([(m >> p) & 1 for p in range(num_places)], v) for v, m in entries]
+
+
+# ---------------------------
+# Batch optimization
+# ---------------------------
+
+def optimize_batch(
+    place_ids: List[str],
+    bdd: BinaryDecisionDiagram,
+    C: np.ndarray,
+    place_vars: Optional[Sequence[Any]] = None,
+    maximize: bool = True,
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Optimizes k linear objectives over the same reachable set at once.
+
+    The longest-path DP of max_reachable_marking is run for all objectives
+    together: node values are a (nodes x k) array, and nodes of equal height
+    (distance to the terminals) are updated in one vectorized step, so the
+    BDD is traversed once for the whole batch.
+
+    Args:
+        place_ids: Names of the BDD variables (used when place_vars is None).
+        bdd: The reachable-set BDD (from Task 3).
+        C: (k x places) weight matrix, one objective per row.
+        place_vars: Place-index -> BDD variable list (see bdd_reachable).
+        maximize: Maximize c·M if True, minimize it otherwise.
+
+    Returns:
+        Tuple: (markings, values)
+            - markings: (k x places) int array, row i optimal for C[i].
+            - values: (k,) array of optimal values.
+            - Returns (None, None) if the reachable set is empty.
+    """
     if bdd.is_zero():
         return None, None
 
-    # Initialize max_val with negative infinity to ensure any valid marking will be greater.
-    max_val = -float('inf')
-    best_marking = None
-
-    # Iterate through all satisfying assignments (solutions) of the BDD.
-    # Note: 'satisfy_all()' returns an iterator of points (dictionaries).
-    # A point might be a partial assignment (e.g., {p1: 1, p3: 0}), meaning 
-    # unlisted variables (e.g., p2) are "Don't Care" (can be 0 or 1).
-    for point in bdd.satisfy_all():
-        current_marking = []
-        current_val = 0
-        
-        # Convert BDD variable objects in the 'point' dictionary to strings for easier lookup.
-        # Example: {p[0]: 1} -> {'p1': 1} (assuming variables are named correctly)
-        point_str_keys = {str(k): v for k, v in point.items()}
-
-        for i, place_name in enumerate(place_ids):
-            weight = c[i]
-            
-            # Check if the variable for this place is explicitly defined in the BDD solution.
-            if place_name in point_str_keys:
-                # If defined, use the value from the BDD (0 or 1).
-                bit = point_str_keys[place_name]
-            else:
-                # Case 2: Variable is "Don't Care" (not in the point dictionary).
-                # Optimization Strategy:
-                # - If weight > 0: Choose 1 to maximize the sum.
-                # - If weight <= 0: Choose 0 to avoid reducing the sum.
-                bit = 1 if weight > 0 else 0
-            
-            # Construct the marking vector and accumulate the objective value.
-            current_marking.append(bit)
-            current_val += bit * weight
-
-        # Update the global maximum if the current marking is better.
-        if current_val > max_val:
-            max_val = current_val
-            best_marking = current_marking
-
-    return best_marking, max_val
\ No newline at end of file
+    if place_vars is None:
+        place_vars = bdd_vars_by_name(place_ids, bdd)
+    num_places = len(place_vars)
+    C = np.atleast_2d(np.asarray(C, dtype=float))[:, :num_places]
+    W = C if maximize else -C          # minimizing c·M = maximizing -c·M
+    k = len(W)
+    flat = flatten_bdd(bdd, list(place_vars))
+
+    # prefix[r] = sum of positive weights at order positions < r (per objective)
+    order = np.array(flat.order, dtype=int)
+    gain = np.maximum(W[:, order], 0) if len(order) else np.zeros((k, 0))
+    prefix = np.zeros((len(order) + 1, k))
+    prefix[1:] = np.cumsum(gain.T, axis=0)
+
+    place, rank, lo, hi = flat.place, flat.rank, flat.lo, flat.hi
+    num_nodes = len(place)
+
+    # Height of every node; children always have a smaller index
+    height = np.zeros(num_nodes, dtype=int)
+    for u in range(2, num_nodes):
+        height[u] = 1 + max(height[lo[u]], height[hi[u]])
+
+    best = np.full((num_nodes, k), -np.inf)
+    best[1] = 0.0
+    take_hi = np.zeros((num_nodes, k), dtype=bool)
+
+    for h in range(1, height.max() + 1):
+        G = np.nonzero(height == h)[0]
+        start = prefix[rank[G] + 1]
+        v0 = best[lo[G]] + prefix[rank[lo[G]]] - start
+        v1 = best[hi[G]] + prefix[rank[hi[G]]] - start + W[:, place[G]].T
+        take_hi[G] = v1 > v0
+        best[G] = np.maximum(v0, v1)
+
+    # Walk the k argmax paths together; don't-cares follow their weight sign
+    markings = (W > 0).astype(int)
+    cur = np.full(k, flat.root)
+    cols = np.arange(k)
+    active = cur > 1
+    while active.any():
+        u = cur[active]
+        choice = take_hi[u, cols[active]]
+        markings[cols[active], place[u]] = choice.astype(int)
+        cur[active] = np.where(choice, hi[u], lo[u])
+        active = cur > 1
+
+    values = (markings * C).sum(axis=1)
+    return markings, values
+
+
+def load_objectives(path: str) -> np.ndarray:
+    """
+    Reads a (k x places) objective matrix: a .npy file, or a text file with
+    one objective per line (comma or whitespace separated, '#' comments).
+    """
+    if path.endswith(".npy"):
+        return np.atleast_2d(np.load(path))
+    with open(path) as f:
+        text = f.read().replace(",", " ")
+    rows = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            rows.append([float(v) for v in line.split()])
+    return np.array(rows)